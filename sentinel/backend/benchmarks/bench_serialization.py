@@ -0,0 +1,74 @@
+"""
+Bytes and time spent serializing the commit history: on disk, in responses and on the wire.
+
+    cd sentinel/backend && python -m benchmarks.bench_serialization --records 20000
+"""
+import argparse
+import gzip
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.synthetic import processed_records
+from services import codec
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def timed(fn, repeat: int = 3):
+    """Best-of-repeat wall time in ms, and the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def row(label, size, ms, baseline_size=None, baseline_ms=None):
+    saved = ""
+    if baseline_size:
+        saved = f"  bytes -{100 - size / baseline_size * 100:4.1f}%"
+    if baseline_ms:
+        saved += f"  time x{baseline_ms / ms:4.1f}" if ms else ""
+    print(f"  {label:<34}{size / 1024:>10.1f} KiB{ms:>10.1f} ms{saved}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=20000)
+    args = parser.parse_args()
+    records = processed_records(args.records)
+    print(f"{args.records} records, codec={codec.CODEC}, brotli={'yes' if brotli else 'no'}")
+
+    print("store file (write / read)")
+    ms, old = timed(lambda: json.dumps(records, indent=2).encode())
+    row("json indent=2 dump", len(old), ms)
+    load_ms, _ = timed(lambda: json.loads(old))
+    row("json indent=2 load", len(old), load_ms)
+    new_ms, new = timed(lambda: codec.dumps(records))
+    row(f"{codec.CODEC} compact dump", len(new), new_ms, len(old), ms)
+    new_load_ms, _ = timed(lambda: codec.loads(new))
+    row(f"{codec.CODEC} compact load", len(new), new_load_ms, len(old), load_ms)
+
+    print("response body (/api/history)")
+    ms, old = timed(lambda: json.dumps(jsonable_encoder(records), separators=(",", ":")).encode())
+    row("jsonable_encoder + json", len(old), ms)
+    new_ms, new = timed(lambda: codec.FastJSONResponse(records).body)
+    row("FastJSONResponse", len(new), new_ms, len(old), ms)
+
+    print("on the wire (compression of that body)")
+    row("identity", len(new), 0.0)
+    ms, body = timed(lambda: gzip.compress(new, compresslevel=6))
+    row("gzip level 6", len(body), ms, len(new))
+    if brotli is not None:
+        ms, body = timed(lambda: brotli.compress(new, quality=4))
+        row("brotli quality 4", len(body), ms, len(new))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Benchmark suite for the scoring, ingestion and query paths.
+
+For each dataset size a fresh subprocess gets an empty temporary store, ingests that many
+synthetic raw commits through /api/process_commits, then times the read endpoints. Results
+(with peak memory and run metadata) are written to a JSON file so runs can be compared.
+
+    cd sentinel/backend
+    python -m benchmarks.run --sizes 10000,100000,1000000
+    python -m benchmarks.run --compare benchmarks/results/OLD.json benchmarks/results/NEW.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.synthetic import raw_commits, write_json_array
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# (name, method, path) timed at every dataset size
+READ_ENDPOINTS = [
+    ("history_full", "GET", "/api/history"),
+    ("history_page", "GET", "/api/history?limit=100"),
+    ("history_page_deep", "GET", "/api/history?limit=100&min_risk=20&max_risk=80"),
+    ("history_project", "GET", "/api/history?project=project-3&limit=100"),
+    ("history_since", "GET", "/api/history?since=1"),
+    ("insights", "GET", "/api/insights"),
+    ("stats", "GET", "/api/stats"),
+    ("export_csv", "GET", "/api/export/csv"),
+    ("export_ndjson", "GET", "/api/export/ndjson"),
+    ("export_pdf", "GET", "/api/export/pdf"),
+]
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF) -> float:
+    """Peak resident set size so far (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def per_commit_us(fn, items, repeat: int = 3) -> float:
+    """Best-of-repeat cost of fn(items) divided by len(items), in microseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(items)
+        best = min(best, time.perf_counter() - start)
+    return round(best / len(items) * 1e6, 2)
+
+
+def bench_scoring(sample: int) -> dict:
+    """Per-commit cost of each scoring stage, on the same synthetic commits."""
+    from services.compliance_checker import check_compliance
+    from services.ingest import _raw_features, score_chunk, score_raw_commit
+    from services.risk_predictor import extract_features, predict_risk_score
+
+    commits = list(raw_commits(sample, seed=11))
+    features = [extract_features(_raw_features(c)) for c in commits]
+    return {
+        "sample": sample,
+        "check_compliance_us": per_commit_us(lambda cs: [
+            check_compliance(
+                commit_message=c["commit_message"], changed_files=c["file_modified"],
+                author_email=c["user_email"], timestamp=c["timestamp"],
+            ) for c in cs
+        ], commits),
+        "extract_features_us": per_commit_us(lambda cs: [extract_features(_raw_features(c)) for c in cs], commits),
+        "predict_risk_score_us": per_commit_us(lambda fs: [predict_risk_score(f) for f in fs], features),
+        "score_raw_commit_us": per_commit_us(lambda cs: [score_raw_commit(c) for c in cs], commits),
+        "score_chunk_us": per_commit_us(score_chunk, commits),
+    }
+
+
+def bench_size(size: int, workers: int, repeat: int) -> dict:
+    """Ingest `size` commits into an empty store, then time the read endpoints. Runs in a child process."""
+    workdir = Path(tempfile.mkdtemp(prefix=f"sentinel-bench-{size}-"))
+    raw_path = workdir / "raw_commits.json"
+    write_json_array(raw_path, raw_commits(size))
+    os.environ.update({
+        "RAW_DATA_FILE": str(raw_path),
+        "DATA_FILE": str(workdir / "prototype.json"),
+        "STORE_FILE": str(workdir / "sentinel.db"),
+    })
+
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+    result = {"size": size, "workers": workers, "rss_before_ingest_mb": peak_rss_mb()}
+
+    start = time.perf_counter()
+    response = client.post(f"/api/process_commits?wait=true&workers={workers}&chunk_size=1000")
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    result["process_commits"] = {
+        "seconds": round(elapsed, 3),
+        "commits_per_sec": round(size / elapsed, 1),
+        "stored": main.STORE.count(),
+    }
+    result["rss_after_ingest_mb"] = peak_rss_mb()
+
+    latencies = {}
+    for name, method, path in READ_ENDPOINTS:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = client.request(method, path)
+            timings.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+        latencies[name] = {
+            "min_ms": round(min(timings), 2),
+            "median_ms": round(statistics.median(timings), 2),
+            "bytes": len(response.content),
+        }
+    result["latency"] = latencies
+    result["peak_rss_mb"] = peak_rss_mb()
+    result["peak_rss_children_mb"] = peak_rss_mb(resource.RUSAGE_CHILDREN)
+    shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+
+def metadata() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    from services import codec
+    from services import risk_predictor
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "codec": codec.CODEC,
+        "numpy": risk_predictor.np is not None,
+    }
+
+
+def flatten(result: dict, prefix: str = ""):
+    """Yield (dotted.name, value) for every numeric leaf."""
+    for key, value in result.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from flatten(value, name + ".")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+def compare(old_path: Path, new_path: Path):
+    """Print every metric of two result files side by side."""
+    old, new = (json.loads(Path(p).read_text()) for p in (old_path, new_path))
+    print(f"{'metric':<58}{'old':>12}{'new':>12}{'change':>10}")
+    sections = [("scoring", old.get("scoring", {}), new.get("scoring", {}))]
+    old_sizes = {r["size"]: r for r in old.get("sizes", [])}
+    for run in new.get("sizes", []):
+        if run["size"] in old_sizes:
+            sections.append((f"size={run['size']}", old_sizes[run["size"]], run))
+    for label, before, after in sections:
+        before = dict(flatten(before))
+        for name, value in flatten(after):
+            if name not in before or name in ("size", "workers", "sample"):
+                continue
+            change = f"{(value / before[name] - 1) * 100:+.1f}%" if before[name] else ""
+            print(f"{label + ' ' + name:<58}{before[name]:>12}{value:>12}{change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000", help="comma-separated commit counts (10k-1M)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="process_commits workers")
+    parser.add_argument("--repeat", type=int, default=5, help="timed requests per endpoint")
+    parser.add_argument("--scoring-sample", type=int, default=20000)
+    parser.add_argument("--out", type=Path, help="result file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("OLD", "NEW"))
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.child:
+        # Last line of stdout; anything the app prints comes before it
+        print(json.dumps(bench_size(args.child, args.workers, args.repeat)))
+        return
+
+    results = {"meta": metadata(), "scoring": bench_scoring(args.scoring_sample), "sizes": []}
+    print(f"scoring: {results['scoring']}", file=sys.stderr)
+    for size in (int(s) for s in args.sizes.split(",")):
+        # A fresh interpreter per size keeps stores, caches and peak RSS independent
+        child = subprocess.run(
+            [sys.executable, "-m", "benchmarks.run", "--child", str(size),
+             "--workers", str(args.workers), "--repeat", str(args.repeat)],
+            capture_output=True, text=True, check=True,
+        )
+        run = json.loads(child.stdout.strip().splitlines()[-1])
+        results["sizes"].append(run)
+        print(f"size {size}: {run['process_commits']['commits_per_sec']} commits/s, "
+              f"peak {run['peak_rss_mb']} MB", file=sys.stderr)
+
+    out = args.out or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{results['meta']['git_commit'] or 'local'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2))
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Deterministic synthetic commits in the raw_commits.json / prototype.json schema.
+
+    cd sentinel/backend && python -m benchmarks.synthetic 100000 -o /tmp/raw_commits.json
+"""
+import argparse
+import random
+from datetime import datetime, timedelta, timezone
+
+from services import codec
+
+PROJECTS = [f"project-{i}" for i in range(12)]
+USERS = [f"user{i}" for i in range(40)]
+AUTHORIZED = ["huy@gmail.com", "son@gmail.com", "pooja@gmail.com", "kas@gmail.com", "gayan@gmail.com"]
+DIRS = ["core", "db", "auth", "api", "ui", "docs", "tests"]
+MESSAGES = [
+    "feat: add export endpoint for reports",
+    "fix: handle missing timestamp in parser",
+    "docs: update setup instructions",
+    "test: cover compliance edge cases",
+    "refactor risk predictor",
+    "quick fix",
+    "fix: temporary workaround for login, test only",
+    "feat(ui): dashboard filters fix: typo",
+]
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def raw_commits(n: int, seed: int = 7):
+    """Yield n raw commits; the same (n, seed) always gives the same commits."""
+    rng = random.Random(seed)
+    for i in range(n):
+        user = rng.choice(USERS)
+        email = rng.choice(AUTHORIZED) if rng.random() < 0.8 else f"{user}@example.com"
+        files = [
+            f"{rng.choice(DIRS)}/module_{rng.randrange(300)}{rng.choice(['.py', '.py', '.js', '.tmp'])}"
+            for _ in range(rng.randrange(1, 8))
+        ]
+        yield {
+            "id": i,
+            "user": user,
+            "user_email": email,
+            "author_email": email,
+            "project": rng.choice(PROJECTS),
+            "branch": rng.choice(["main", "develop", f"feature/{i % 97}"]),
+            "commit_message": rng.choice(MESSAGES),
+            "commit_hash": f"{seed:08x}{i:032x}",
+            "repo_url": "https://github.com/example/sentinel",
+            "timestamp": (EPOCH - timedelta(minutes=rng.randrange(525600))).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "lines_changed": int(rng.lognormvariate(3.5, 1.2)),
+            "prev_bugs": rng.randrange(6),
+            "test_coverage": rng.randrange(30, 101),
+            "file_added": files[:1] if rng.random() < 0.3 else [],
+            "file_removed": [],
+            "file_modified": files,
+        }
+
+
+def processed_records(n: int, seed: int = 7):
+    """n records shaped like stored results (raw commit + score fields), without running the scorer."""
+    rng = random.Random(seed + 1)
+    records = []
+    for commit in raw_commits(n, seed):
+        risk = round(rng.uniform(0, 100), 1)
+        records.append({
+            **commit,
+            "risk_score": risk,
+            "confident_score": rng.randrange(30, 100),
+            "freeze_request": risk > 50 or rng.random() < 0.2,
+            "feedback": "feature allowed",
+            "factor_impact": {"lines_changed": -12.5, "touches_core": 0, "prev_bugs": -10,
+                              "test_coverage": -3.0, "num_files_modified": -4},
+            "score_version": "heuristic-1+rules-000000000000",
+        })
+    return records
+
+
+def write_json_array(path, items):
+    """Stream items to a JSON array file without holding them all in memory."""
+    with open(path, "wb") as f:
+        f.write(b"[")
+        for i, item in enumerate(items):
+            if i:
+                f.write(b",\n")
+            f.write(codec.dumps(item))
+        f.write(b"]\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("count", type=int)
+    parser.add_argument("-o", "--output", default="raw_commits.json")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    write_json_array(args.output, raw_commits(args.count, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Makes the backend directory importable (`services`, `main`) when pytest runs from the repo root
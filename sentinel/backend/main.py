@@ -1,17 +1,43 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Query, Depends, Header
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-import json, os
-from services.compliance_checker import check_compliance
-from services.risk_predictor import predict_risk_score, extract_features
+from fastapi.middleware.gzip import GZipMiddleware
+import os
+from services.storage import atomic_write, file_lock, open_store, parse_timestamp, dedup_key, matches_filters
+from services.aggregates import SERIES_INTERVALS, AggregateEngine
+from services.exporter import EXPORT_FORMATS, gzip_chunks
+from services.ingest import (
+    SCORING_VERSION,
+    analysis_key,
+    NDJSONDecoder,
+    Spool,
+    ingest_stream,
+    iter_json_array,
+    iter_ndjson,
+    rescore_stream,
+    score_payload,
+    score_payloads,
+)
+from services.cache import LRUCache
+from services.metrics import MetricsMiddleware, render_metrics, stage_timer
+from services.profiling import PROFILES, ProfiledRoute, ProfilingMiddleware
+from services.codec import FastJSONResponse, dumps
+from services.jobs import JobRegistry, JobQueue
 from pathlib import Path
-from fastapi.responses import StreamingResponse
-import csv, io
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-import random, traceback
-from datetime import datetime
+from fastapi.responses import Response, StreamingResponse
+from services.events import EventBroker, format_sse
+from services.explainer import ExplanationService, open_explainer
+from services.reports import REPORT_LAYOUT_VERSION, ReportCache, render_summary_pdf
+from email.utils import formatdate, parsedate_to_datetime
+import asyncio, threading, time, traceback
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # gzip only
+    BrotliMiddleware = None
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
+app.router.route_class = ProfiledRoute
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,70 +46,287 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-RAW_PATH = Path("/app/data/raw_commits.json")
-PROCESSED_PATH = Path("/app/data/prototype.json")
+# Large history/export payloads compress ~10x; SSE and already-gzipped exports are left alone
+if BrotliMiddleware is not None:
+    app.add_middleware(
+        BrotliMiddleware, minimum_size=1024, gzip_fallback=True, excluded_handlers=["/api/stream", "/api/export"]
+    )
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=6)
+
+app.add_middleware(ProfilingMiddleware)
+# Outermost, so latency covers compression and the whole streamed body
+app.add_middleware(MetricsMiddleware, routes=app.routes)
+
+RAW_PATH = Path(os.getenv("RAW_DATA_FILE", "/app/data/raw_commits.json"))
+PROCESSED_PATH = Path(os.getenv("DATA_FILE", "/app/data/prototype.json"))
+STORE_PATH = Path(os.getenv("STORE_FILE", "/app/data/sentinel.db"))
+EXPORT_BATCH_SIZE = 500
+
+# "sqlite" (default) imports an existing prototype.json once; "json" keeps the legacy file store.
+STORE = open_store(os.getenv("STORE_BACKEND", "sqlite"), STORE_PATH, legacy_path=PROCESSED_PATH)
+
+# Running totals seeded once from the store and kept current by every ingest; writes made
+# by other worker processes are picked up every STORE_POLL_SEC (0 disables the poller)
+AGGREGATES = AggregateEngine()
+AGGREGATES.load(STORE)
+STORE_POLL_SEC = float(os.getenv("STORE_POLL_SEC", "1.0"))
+
+# Memoized /api/analyze results keyed by (commit hash, payload digest, scoring version);
+# entries are whole records (file lists included), so the budget is in bytes as well
+ANALYSIS_CACHE = LRUCache(
+    maxsize=int(os.getenv("ANALYSIS_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("ANALYSIS_CACHE_TTL", "3600")),
+    maxbytes=int(float(os.getenv("ANALYSIS_CACHE_MB", "32")) * 1024 * 1024),
+    sizeof=lambda record: len(dumps(record)),
+)
+
+JOBS = JobRegistry(store=STORE)
+# Single ingestion worker: raw_commits.json is consumed by one run at a time (and, across
+# worker processes, under RAW_LOCK_PATH)
+RAW_LOCK_PATH = RAW_PATH.with_name(RAW_PATH.name + ".lock")
+# Append-only NDJSON input, ingested from a checkpointed offset (producers: see Spool.append)
+SPOOL = Spool(os.getenv("RAW_SPOOL_FILE", str(RAW_PATH.with_suffix(".ndjson"))))
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+ANALYZE_CHUNK_SIZE = 500
+INGEST_QUEUE = JobQueue(JOBS, workers=1)
+REPORTS = ReportCache(render_summary_pdf)
+EVENTS = EventBroker(
+    max_clients=int(os.getenv("STREAM_MAX_CLIENTS", "100")),
+    queue_size=int(os.getenv("STREAM_QUEUE_SIZE", "256")),
+)
+STREAM_HEARTBEAT_SEC = 15
+
+# "local" (deterministic templates) or "package.module:factory" returning an Explainer
+EXPLANATIONS = ExplanationService(
+    open_explainer(os.getenv("EXPLAINER_BACKEND", "local")),
+    LRUCache(
+        maxsize=int(os.getenv("EXPLAIN_CACHE_SIZE", "10000")),
+        ttl=float(os.getenv("EXPLAIN_CACHE_TTL", "86400")),
+    ),
+    concurrency=int(os.getenv("EXPLAIN_CONCURRENCY", "8")),
+    timeout=float(os.getenv("EXPLAIN_TIMEOUT", "30")),
+)
+EXPLAIN_BATCH_MAX = 500
 
 
 def read_data():
-    if not os.path.exists(PROCESSED_PATH):
-        return []
-    with open(PROCESSED_PATH, "r") as f:
-        return json.load(f)
+    with stage_timer("read_data"):
+        return STORE.all()
+
+
+def history_filters(
+    user: str = None,
+    project: str = None,
+    freeze_request: bool = None,
+    start: str = None,
+    end: str = None,
+    min_risk: float = None,
+    max_risk: float = None,
+):
+    """Collect history query params into store filters (timestamps become epoch seconds)."""
+    filters = {
+        "user": user,
+        "project": project,
+        "freeze_request": freeze_request,
+        "min_risk": min_risk,
+        "max_risk": max_risk,
+    }
+    for key, value in (("start", start), ("end", end)):
+        if value is not None:
+            filters[key] = parse_timestamp(value)
+            if filters[key] is None:
+                raise HTTPException(status_code=400, detail=f"Invalid {key} timestamp: {value}")
+    return filters
+
+
+def records_added(records):
+    """Fold freshly stored records into the aggregates and push them to /api/stream clients."""
+    publish_records(*AGGREGATES.apply_local(STORE, STORE.written_version(), records=records))
+
+
+def records_rescored(pairs):
+    """Swap rescored records into the aggregates and push the new versions to stream clients."""
+    publish_records(*AGGREGATES.apply_local(STORE, STORE.written_version(), pairs=pairs))
+
+
+def sync_aggregates():
+    """Catch up with writes from other worker processes and push them to stream clients."""
+    publish_records(*AGGREGATES.sync(STORE))
+
+
+def publish_records(version, records):
+    # None: the aggregates were rebuilt, so clients cannot patch their state and must reload.
+    # Rescoring keeps project/user/day, so the records' own buckets are all that changed.
+    if not EVENTS.active or records == []:
+        return
+    if records is None:
+        EVENTS.publish("resync", {"dropped": None}, version)
+        return
+    EVENTS.publish("records", {"version": version, "items": records}, version)
+    EVENTS.publish("aggregates", AGGREGATES.delta(records), version)
+
+
+def poll_store():
+    while True:
+        time.sleep(STORE_POLL_SEC)
+        try:
+            sync_aggregates()
+        except Exception:
+            traceback.print_exc()
+
+
+if STORE_POLL_SEC > 0:
+    threading.Thread(target=poll_store, name="store-poller", daemon=True).start()
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True when the request's If-None-Match already names this ETag (weak or strong)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def modified_since(request: Request, last_modified) -> bool:
+    """False when If-Modified-Since is at or after last_modified (whole seconds, as HTTP dates are)."""
+    header = request.headers.get("if-modified-since")
+    if not header or last_modified is None:
+        return True
+    try:
+        return int(last_modified) > parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return True
+
+
+def revalidate(request: Request, response: Response, tag: str, last_modified=None):
+    """
+    Put ETag/Last-Modified validators on the response. Returns a 304 response when the client's
+    copy is current (If-None-Match wins over If-Modified-Since), otherwise None.
+    """
+    etag = f'"{tag}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    response.headers.update(headers)
+    if request.headers.get("if-none-match"):
+        fresh = etag_matches(request, etag)
+    else:
+        fresh = not modified_since(request, last_modified)
+    return Response(status_code=304, headers=headers) if fresh else None
+
+
+def delta(since: int, filters: dict = None, fields: str = None):
+    """
+    {"version", "full", "items"}: the records written after data version `since`, or every
+    record (full=True) when the store cannot compute that delta, e.g. after a replace_all.
+    """
+    version, records = STORE.changes_since(since)
+    full = records is None
+    if full:
+        records = read_data()
+    if filters:
+        records = [r for r in records if matches_filters(r, filters)]
+    return {"version": version, "full": full, "items": project_fields(records, fields)}
 
 
-def write_data(data):
-    with open(PROCESSED_PATH, "w") as f:
-        json.dump(data, f, indent=2)
+def json_response(content, response: Response = None):
+    """
+    Encode a large record payload directly with the fast codec. Returning it as a Response
+    skips FastAPI's jsonable_encoder pass over every record; headers set on `response` carry over.
+    """
+    with stage_timer("serialize"):
+        return FastJSONResponse(content, headers=dict(response.headers) if response is not None else None)
+
+
+def project_fields(records, fields):
+    """Keep only the requested comma-separated fields of each record."""
+    if not fields:
+        return records
+    keep = [f.strip() for f in fields.split(",") if f.strip()]
+    return [{k: r[k] for k in keep if k in r} for r in records]
 
 
 @app.get("/api/history")
-def get_history():
-    """Return all commit records."""
-    return read_data()
+def get_history(
+    request: Request,
+    response: Response,
+    filters: dict = Depends(history_filters),
+    fields: str = None,
+    cursor: str = None,
+    limit: int = Query(None, ge=1, le=1000),
+    since: int = Query(None, ge=0),
+):
+    """
+    Return commit records, newest first.
+    Without parameters this is the full history; with limit/cursor the response is
+    a page: {"items": [...], "next_cursor": "..."}; with since=<version> only the records
+    written after that data version: {"version", "full", "items"}.
+    Unchanged data is answered with 304 to If-None-Match / If-Modified-Since.
+    """
+    # Validators are read before the data, so a concurrent write can only make them stale-safe
+    version = STORE.version()
+    not_modified = revalidate(request, response, f"history-{version}", STORE.last_modified())
+    if not_modified:
+        return not_modified
+
+    if since is not None:
+        if cursor or limit:
+            raise HTTPException(status_code=400, detail="since cannot be combined with cursor/limit")
+        return json_response(delta(since, filters, fields), response)
+
+    if not any(v is not None for v in filters.values()) and not (fields or cursor or limit):
+        return json_response(read_data(), response)
+
+    try:
+        records, next_cursor = STORE.query(filters, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    records = project_fields(records, fields)
+    if limit is None and cursor is None:
+        return json_response(records, response)
+    return json_response({"items": records, "next_cursor": next_cursor}, response)
 
 
 @app.post("/api/analyze")
-def analyze_commit(payload: dict):
+async def analyze_commit(request: Request):
     """
-    Analyze commit payload → combine compliance + risk → append to prototype.json.
+    Analyze commit payload → combine compliance + risk → append to the commit store.
+    An application/x-ndjson body (one payload per line, e.g. a chunked upload) is parsed,
+    scored and stored incrementally, ANALYZE_CHUNK_SIZE payloads at a time, and answered
+    with a summary.
     """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in NDJSON_TYPES:
+        return await analyze_ndjson(request)
     try:
-        compliance = check_compliance(
-            commit_message=payload.get("commit_message", ""),
-            changed_files=payload.get("file_modified", []),
-            pr_title=payload.get("pr_title", ""),
-            pr_labels=payload.get("pr_labels", []),
-            author_email=payload.get("user_email"),
-            timestamp=payload.get("timestamp")
-        )
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=422, detail="Expected a JSON object")
+    return await run_in_threadpool(analyze_payload, payload)
+
 
-        features = extract_features(payload)
-        risk = predict_risk_score(features)
-
-        freeze_request = risk["risk_score"] > 50 or not compliance["is_compliant"]
-
-        record = {
-            "id": payload.get("id") or int(os.urandom(1)[0]),
-            "user": payload.get("user", "anonymous"),
-            "user_email": payload.get("user_email"),
-            "project": payload.get("project", "Unknown"),
-            "commit_message": payload.get("commit_message", ""),
-            "commit_hash": payload.get("commit_hash", "N/A"),
-            "repo_url": payload.get("repo_url", ""),
-            "risk_score": risk["risk_score"],
-            "confident_score": int(compliance.get("confidence", 0) * 100),
-            "freeze_request": freeze_request,
-            "feedback": compliance.get("message", ""),
-            "factor_impact": risk.get("factor_impact"),
-            "file_added": payload.get("file_added", []),
-            "file_removed": payload.get("file_removed", []),
-            "file_modified": payload.get("file_modified", []),
-            "timestamp": payload.get("timestamp"),
-        }
-
-        data = read_data()
-        data.append(record)
-        write_data(data)
+def analyze_payload(payload: dict):
+    try:
+        # Retries and repeated clicks are answered before any scoring work
+        key = analysis_key(payload)
+        record = ANALYSIS_CACHE.get(key)
+        if record is None:
+            commit_hash = dedup_key(payload)
+            existing = STORE.get(commit_hash) if commit_hash else None
+            if existing is not None:
+                return {"status": "duplicate", "new_record": existing}
+            record = score_payload(payload)
+            ANALYSIS_CACHE.set(key, record)
+
+        if not STORE.append(record):
+            return {"status": "duplicate", "new_record": record}
+        records_added([record])
 
         return {"status": "ok", "new_record": record}
 
@@ -91,29 +334,71 @@ def analyze_commit(payload: dict):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/insights")
-def get_ai_insights():
-    """Generate AI-style commit summary."""
+async def analyze_ndjson(request: Request):
+    """Score an NDJSON body batch by batch while it streams in; memory is bounded by one batch."""
+    decoder = NDJSONDecoder(strict=True)
+    batch, read, inserted = [], 0, 0
+
+    def store(payloads):
+        stored = []
+
+        def on_inserted(records):
+            stored.extend(records)
+            records_added(records)
+
+        ingest_stream(
+            payloads, STORE, chunk_size=len(payloads), on_inserted=on_inserted, cache=ANALYSIS_CACHE,
+            score=score_payloads,
+        )
+        return len(stored)
+
+    async def flush():
+        nonlocal batch, read, inserted
+        if batch:
+            inserted += await run_in_threadpool(store, batch)
+            read += len(batch)
+            batch = []
+
     try:
-        if not PROCESSED_PATH.exists():
-            return {"insight": "No data available."}
+        async for data in request.stream():
+            batch.extend(payload for payload, _ in decoder.feed(data))
+            if len(batch) >= ANALYZE_CHUNK_SIZE:
+                await flush()
+        batch.extend(payload for payload, _ in decoder.finish())
+        await flush()
+    except ValueError as e:
+        # Only an over-long line gets here; the payloads before it are still stored
+        await flush()
+        raise HTTPException(status_code=413, detail=f"{e} ({read} payloads stored)")
+
+    return {
+        "status": "ok",
+        "read": read,
+        "inserted": inserted,
+        "duplicates": read - inserted,
+        "invalid": decoder.invalid,
+        "errors": decoder.errors,
+    }
 
-        with open(PROCESSED_PATH, "r") as f:
-            commits = json.load(f)
 
-        if not commits:
+@app.get("/api/insights")
+def get_ai_insights(request: Request, response: Response):
+    """Generate AI-style commit summary."""
+    try:
+        # Insights come from the aggregates, so they are tagged with the version those reflect
+        sync_aggregates()
+        not_modified = revalidate(request, response, f"insights-{AGGREGATES.version}", STORE.last_modified())
+        if not_modified:
+            return not_modified
+        summary = AGGREGATES.summary()
+
+        if not summary["count"]:
             return {"insight": "No commits to analyze."}
 
-        # Compute summary
-        avg_risk = sum(c["risk_score"] for c in commits) / len(commits)
-        avg_conf = sum(c["confident_score"] for c in commits) / len(commits)
-        freeze_count = sum(1 for c in commits if c["freeze_request"])
-        project_count = len(set(c["project"] for c in commits))
-
         insight = (
-            f"Across {project_count} active projects, "
-            f"average risk is {avg_risk:.1f}% and confidence is {avg_conf:.1f}%. "
-            f"There are {freeze_count} freeze requests recorded."
+            f"Across {summary['project_count']} active projects, "
+            f"average risk is {summary['avg_risk']:.1f}% and confidence is {summary['avg_confidence']:.1f}%. "
+            f"There are {summary['freeze_count']} freeze requests recorded."
         )
 
         return {"insight": insight}
@@ -122,64 +407,143 @@ def get_ai_insights():
         return {"error": str(e)}
 
 
-@app.get("/api/export/csv")
-def export_csv():
-    """Export commit data as CSV"""
-    if not PROCESSED_PATH.exists():
-        return {"error": "No data to export"}
+@app.get("/api/stats")
+def get_stats():
+    """Running totals: global, per project, per user and per day."""
+    sync_aggregates()
+    return AGGREGATES.snapshot()
+
+
+@app.get("/api/series")
+def get_series(
+    request: Request,
+    response: Response,
+    interval: str = "day",
+    group_by: str = None,
+    start: str = None,
+    end: str = None,
+    max_points: int = Query(200, ge=10, le=2000),
+    limit: int = Query(10, ge=1, le=100),
+):
+    """
+    Chart series bucketed by hour/day/week: count, avg risk, avg confidence and freeze rate,
+    overall or per project/user (the `limit` busiest). Long ranges are downsampled to at most
+    max_points buckets per series ("step" intervals per bucket).
+    """
+    if interval not in SERIES_INTERVALS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of {', '.join(SERIES_INTERVALS)}")
+    if group_by not in (None, "project", "user"):
+        raise HTTPException(status_code=400, detail="group_by must be project or user")
+    bounds = history_filters(start=start, end=end)
+    sync_aggregates()
+    not_modified = revalidate(request, response, f"series-{AGGREGATES.version}", STORE.last_modified())
+    if not_modified:
+        return not_modified
+    return AGGREGATES.series(interval, group_by, bounds.get("start"), bounds.get("end"), max_points, limit)
+
+
+def stream_export(fmt: str, filters: dict, compress: bool):
+    """Stream the store in batches through the chosen encoder (optionally gzipped)."""
+    encode, media_type, extension = EXPORT_FORMATS[fmt]
+    chunks = encode(STORE.iter_batches(filters, batch_size=EXPORT_BATCH_SIZE))
+    filename = f"report_data.{extension}"
+    if compress:
+        chunks = gzip_chunks(chunks)
+        media_type = "application/gzip"
+        filename += ".gz"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
 
-    with open(PROCESSED_PATH, "r") as f:
-        commits = json.load(f)
 
-    output = io.StringIO()
-    writer = csv.DictWriter(output, fieldnames=commits[0].keys())
-    writer.writeheader()
-    writer.writerows(commits)
-    output.seek(0)
+@app.get("/api/cache")
+def get_cache_stats():
+    """Hit/miss counters and size of the analysis memoization cache (and of the explanation cache)."""
+    return {**ANALYSIS_CACHE.stats(), "explanations": EXPLANATIONS.stats()}
+
+
+@app.get("/api/stream")
+async def stream_events(request: Request, last_event_id: str = Header(None)):
+    """
+    Server-Sent Events: "records" as analyze/process_commits/rescore store them and matching
+    "aggregates" deltas (changed /api/stats buckets). Event ids are data versions, so a
+    reconnecting client first receives what it missed; "resync" means its queue overflowed
+    and it should reload (e.g. /api/history?since=<last version>).
+    """
+    subscriber = EVENTS.subscribe()
+    if subscriber is None:
+        raise HTTPException(status_code=503, detail="Too many stream clients")
+
+    async def events():
+        try:
+            await run_in_threadpool(sync_aggregates)
+            version = await run_in_threadpool(STORE.version)
+            yield format_sse("hello", {"version": version}, version)
+            if last_event_id and last_event_id.isdigit():
+                version, missed = await run_in_threadpool(STORE.changes_since, int(last_event_id))
+                if missed is None:
+                    yield format_sse("resync", {"dropped": None}, version)
+                elif missed:
+                    yield format_sse("records", {"version": version, "items": missed}, version)
+                    yield format_sse("aggregates", AGGREGATES.delta(missed), version)
+            while not await request.is_disconnected():
+                batch = await subscriber.get(timeout=STREAM_HEARTBEAT_SEC)
+                if not batch:
+                    yield ": ping\n\n"
+                for event, data, event_id in batch:
+                    yield format_sse(event, data, event_id)
+        finally:
+            EVENTS.unsubscribe(subscriber)
 
     return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=report_data.csv"},
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
-@app.get("/api/export/pdf")
-def export_pdf():
-    """Export commit summary as PDF"""
-    if not PROCESSED_PATH.exists():
-        return {"error": "No data to export"}
+@app.get("/api/stream/stats")
+def get_stream_stats():
+    """Connected stream clients and events dropped by slow ones."""
+    return EVENTS.stats()
 
-    with open(PROCESSED_PATH, "r") as f:
-        commits = json.load(f)
 
-    avg_risk = sum(c["risk_score"] for c in commits) / len(commits)
-    avg_conf = sum(c["confident_score"] for c in commits) / len(commits)
-    freeze_count = sum(1 for c in commits if c["freeze_request"])
-    project_count = len(set(c["project"] for c in commits))
+@app.get("/api/export/csv")
+def export_csv(filters: dict = Depends(history_filters), gzip: bool = False):
+    """Export commit data as CSV (same filters as /api/history)"""
+    return stream_export("csv", filters, gzip)
 
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer)
-    styles = getSampleStyleSheet()
 
-    content = [
-        Paragraph("<b>Sentinel AI Report Summary</b>", styles["Title"]),
-        Spacer(1, 20),
-        Paragraph(f"Projects Analyzed: {project_count}", styles["Normal"]),
-        Paragraph(f"Average Risk Score: {avg_risk:.1f}%", styles["Normal"]),
-        Paragraph(f"Average Confidence Score: {avg_conf:.1f}%", styles["Normal"]),
-        Paragraph(f"Freeze Requests: {freeze_count}", styles["Normal"]),
-        Spacer(1, 20),
-        Paragraph("Generated automatically by Sentinel Analytics Dashboard.", styles["Italic"]),
-    ]
+@app.get("/api/export/ndjson")
+def export_ndjson(filters: dict = Depends(history_filters), gzip: bool = False):
+    """Export commit data as newline-delimited JSON (same filters as /api/history)"""
+    return stream_export("ndjson", filters, gzip)
 
-    doc.build(content)
-    buffer.seek(0)
 
-    return StreamingResponse(
-        buffer,
+@app.get("/api/export/pdf")
+async def export_pdf(request: Request):
+    """Export commit summary as PDF (rendered off the event loop, cached per data version)"""
+    await run_in_threadpool(sync_aggregates)
+    # One snapshot for both the ETag and the render, so a write landing in between cannot
+    # put newer content under an older ETag
+    report = await run_in_threadpool(AGGREGATES.report)
+    if not report["summary"]["count"]:
+        return {"error": "No data to export"}
+
+    # The version is the same in every worker process; the generation only keys the local cache
+    key = (report["version"], report["generation"])
+    etag = f'"pdf-{REPORT_LAYOUT_VERSION}-{key[0]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    pdf = await asyncio.wrap_future(REPORTS.get(key, lambda: report))
+    return Response(
+        pdf,
         media_type="application/pdf",
-        headers={"Content-Disposition": "attachment; filename=report_summary.pdf"},
+        headers={**headers, "Content-Disposition": "attachment; filename=report_summary.pdf"},
     )
 
 
@@ -190,132 +554,180 @@ def fake_login():
 
 
 @app.post("/api/github/fetch_commits")
-def fetch_commits():
-    path = "data/prototype.json"
-    if not os.path.exists(path):
-        return {"error": "prototype.json not found"}
-    with open(path) as f:
-        data = json.load(f)
-    return data
+def fetch_commits(request: Request, response: Response, since: int = Query(None, ge=0)):
+    """Full dataset (or the delta after data version `since`), revalidated like /api/history."""
+    version = STORE.version()
+    not_modified = revalidate(request, response, f"commits-{version}", STORE.last_modified())
+    if not_modified:
+        return not_modified
+    if since is not None:
+        return json_response(delta(since), response)
+    return json_response(read_data(), response)
 
 
-@app.post("/api/process_commits")
-def process_commits():
-    """
-    Process commits from raw_commits.json → analyze risk/compliance,
-    merge into prototype.json (sorted), and clear raw_commits.json.
-    """
-    try:
-        if not RAW_PATH.exists():
-            return {"error": "raw_commits.json not found"}
-
-        # Load raw commits
-        with open(RAW_PATH, "r") as f:
-            raw_data = json.load(f)
-
-        if not raw_data:
-            return {"message": "No new commits to process."}
-
-        processed = []
-        for commit in raw_data:
-            features = extract_features({
-                "lines_changed": commit.get("lines_changed", 40),
-                "prev_bugs": commit.get("prev_bugs", 1),
-                "test_coverage": commit.get("test_coverage", 90),
-                "files": commit.get("file_modified", []),
-            })
-            risk_result = predict_risk_score(features)
-
-            compliance = check_compliance(
-                commit_message=commit.get("commit_message", ""),
-                changed_files=commit.get("file_modified", []),
-                pr_title="",
-                pr_labels=[],
-                author_email=commit.get("user_email"),
-                timestamp=commit.get("timestamp")
-            )
-
-            freeze_request = risk_result["risk_score"] > 50 or not compliance["is_compliant"]
-
-            processed.append({
-                **commit,
-                "risk_score": round(risk_result["risk_score"], 1),
-                "confident_score": int(compliance.get("confidence", 0) * 100),
-                "freeze_request": freeze_request,
-                "feedback": compliance["message"],
-                "factor_impact": risk_result.get("factor_impact")
-            })
-
-        existing_data = []
-        if PROCESSED_PATH.exists():
-            with open(PROCESSED_PATH, "r") as f:
-                existing_data = json.load(f)
-
-        existing_hashes = {c.get("commit_hash") for c in existing_data}
-        merged_data = existing_data + [
-            c for c in processed if c.get("commit_hash") not in existing_hashes
-        ]
-
-        # Sort newest first
-        def parse_time(ts):
-            try:
-                return datetime.fromisoformat(ts.replace("Z", ""))
-            except Exception:
-                return datetime.min
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus text exposition: request latency/in-flight, pipeline stage and rule timings."""
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
-        merged_data.sort(key=lambda c: parse_time(c["timestamp"]), reverse=True)
 
-        with open(PROCESSED_PATH, "w") as f:
-            json.dump(merged_data, f, indent=2)
+@app.get("/debug/profiles")
+def list_profiles():
+    """Recent request profiles (PROFILE_ENABLED=1, then send "X-Profile: 1" or set PROFILE_SAMPLE_RATE)."""
+    return PROFILES.list()
 
-        # Clear raw commits
-        with open(RAW_PATH, "w") as f:
-            json.dump([], f, indent=2)
 
-        return {
-            "message": f"✅ Processed {len(processed)} new commits. "
-                       f"Prototype updated with {len(merged_data)} total entries (sorted).",
-            "count": len(merged_data),
-        }
+@app.get("/debug/profiles/{profile_id}")
+def get_profile(profile_id: str):
+    """pstats report (top functions by cumulative time) of one profiled request."""
+    profile = PROFILES.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return Response(profile["stats"], media_type="text/plain")
 
-    except Exception as e:
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    """Status, progress and throughput of an ingestion job (started by any worker process)."""
+    job = JOBS.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+def run_process_commits(job, workers: int = 1, chunk_size: int = 500):
+    """
+    Process commits from the raw_commits.ndjson spool (from its checkpoint on) and from
+    raw_commits.json → analyze risk/compliance, merge into the commit store, and clear both.
+    The files are streamed in chunks; workers > 1 scores chunks on a process pool.
+    """
+    if not SPOOL.exists() and not RAW_PATH.exists():
+        raise FileNotFoundError("raw_commits.json not found")
+
+    ingest = dict(
+        store=STORE, job=job, workers=workers, chunk_size=chunk_size, on_inserted=records_added
+    )
+    scored, errors, spool_failure = 0, [], None
+    # Other worker processes wait here rather than ingest the same file twice
+    with file_lock(RAW_LOCK_PATH):
+        if SPOOL.exists():
+            # The checkpoint follows the store, so a crashed run resumes at its first unstored commit
+            decoder = NDJSONDecoder(SPOOL.offset())
+            try:
+                scored += ingest_stream(iter_ndjson(SPOOL.path, decoder), checkpoint=SPOOL.commit, **ingest)
+                # Everything read is stored now; this also moves past trailing invalid lines
+                SPOOL.commit(decoder.offset)
+                SPOOL.compact()
+            except Exception as e:
+                # raw_commits.json is still processed; the job reports the failure afterwards
+                traceback.print_exc()
+                spool_failure = e
+            errors = decoder.errors
+
+        if RAW_PATH.exists():
+            read = ingest_stream(iter_json_array(RAW_PATH), **ingest)
+            if read:
+                # Clear raw commits
+                atomic_write(RAW_PATH, b"[]\n")
+            scored += read
+
+    if spool_failure is not None:
+        raise RuntimeError(f"{SPOOL.path.name}: {spool_failure}") from spool_failure
+
+    if not scored:
+        return {"message": "No new commits to process.", "errors": errors}
+
+    total = STORE.count()
+
+    return {
+        "message": f"✅ Processed {scored} new commits. "
+                   f"Prototype updated with {total} total entries (sorted).",
+        "count": total,
+        "errors": errors,
+    }
+
+
+@app.post("/api/process_commits", status_code=202)
+def process_commits(
+    workers: int = Query(1, ge=1, le=64),
+    chunk_size: int = Query(500, ge=1, le=50000),
+    wait: bool = False,
+):
+    """
+    Queue processing of raw_commits.json and return the job id straight away.
+    Clicks while a run is already queued share that job; wait=true blocks until it finishes.
+    """
+    job = INGEST_QUEUE.submit(
+        "process_commits",
+        lambda j: run_process_commits(j, workers=workers, chunk_size=chunk_size),
+    )
+    if wait:
+        job.wait()
+        if job.status == "failed":
+            raise HTTPException(status_code=500, detail=job.error)
+        return {**job.result, "job_id": job.id, "commits_per_sec": job.to_dict()["commits_per_sec"]}
+    return {"job_id": job.id, "status": job.status}
+
+
+@app.post("/api/rescore", status_code=202)
+def rescore(
+    workers: int = Query(1, ge=1, le=64),
+    chunk_size: int = Query(500, ge=1, le=50000),
+    wait: bool = False,
+):
+    """
+    Recompute records scored by an older rule/model version (see score_version on each record).
+    Runs as a coalesced background job; up-to-date records are not rewritten.
+    """
+    def run(job):
+        rescored = rescore_stream(
+            STORE,
+            job=job,
+            workers=workers,
+            chunk_size=chunk_size,
+            on_updated=records_rescored,
+        )
+        return {"rescored": rescored, "score_version": SCORING_VERSION}
+
+    job = INGEST_QUEUE.submit("rescore", run)
+    if wait:
+        job.wait()
+        if job.status == "failed":
+            raise HTTPException(status_code=500, detail=job.error)
+        return {**job.result, "job_id": job.id}
+    return {"job_id": job.id, "status": job.status}
 
 
 @app.post("/api/ai_explain")
 async def ai_explain(request: Request):
+    """Reasoning behind one record's freeze decision (cached, see /api/ai_explain/batch)."""
     try:
         data = await request.json()
 
         if not isinstance(data, dict):
             return {"ai_explanation": "Invalid input format — expected JSON object."}
 
-        risk = data.get("risk_score", 0)
-        conf = data.get("confident_score", 0)
-        freeze = data.get("freeze_request", False)
-        message = data.get("commit_message", "")
-
-        if freeze:
-            reason = (
-                f"The commit '{message}' shows a high risk score ({risk}) and "
-                f"lower confidence ({conf}%). The system recommends a freeze."
-            )
-        else:
-            reason = (
-                f"The commit '{message}' is stable with risk {risk} and confidence {conf}%."
-            )
-
-        variations = [
-            reason,
-            f"AI analysis: '{message}' classified as {'risky' if freeze else 'stable'} "
-            f"(risk={risk}, confidence={conf}). Decision: {'freeze' if freeze else 'continue'}.",
-            f"This commit {'may cause instability' if freeze else 'is low-risk and stable'} "
-            f"based on metrics and history.",
-        ]
-
-        return {"ai_explanation": random.choice(variations)}
+        explanation, _ = await EXPLANATIONS.explain(data)
+        return {"ai_explanation": explanation}
 
     except Exception as e:
         traceback.print_exc()
         return {"ai_explanation": f"⚠️ Internal error: {str(e)}"}
+
+
+@app.post("/api/ai_explain/batch")
+async def ai_explain_batch(request: Request):
+    """
+    Explanations for many records at once: {"records": [...]} (or a bare list) in,
+    {"explainer", "items": [{"commit_hash", "ai_explanation", "cached"}]} out, in input order.
+    """
+    try:
+        data = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    records = data.get("records") if isinstance(data, dict) else data
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        raise HTTPException(status_code=400, detail="Expected a list of record objects")
+    if len(records) > EXPLAIN_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {EXPLAIN_BATCH_MAX} records per batch")
+    return {"explainer": EXPLANATIONS.explainer.name, "items": await EXPLANATIONS.explain_many(records)}
@@ -0,0 +1,310 @@
+import math
+import threading
+from datetime import datetime, timezone
+
+from services.storage import parse_timestamp
+
+HOUR = 3600
+# Chart bucket widths for /api/series, all rolled up from hourly totals
+SERIES_INTERVALS = {"hour": HOUR, "day": 24 * HOUR, "week": 7 * 24 * HOUR}
+# Weeks start on Monday; the epoch was a Thursday
+WEEK_OFFSET = 4 * 24 * HOUR
+
+
+def day_key(record: dict) -> str:
+    """UTC calendar day of a record, or "unknown" for missing/invalid timestamps."""
+    return _day(parse_timestamp(record.get("timestamp") or ""))
+
+
+def _day(ts) -> str:
+    if ts is None:
+        return "unknown"
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def bucket_start(ts: float, width: int) -> int:
+    """Start (epoch seconds) of the bucket of the given width holding ts; week multiples start on Monday."""
+    offset = WEEK_OFFSET if width % SERIES_INTERVALS["week"] == 0 else 0
+    return int((ts - offset) // width * width + offset)
+
+
+def _bucket_count(first: float, last: float, width: int) -> int:
+    """Number of buckets of the given width from the one holding `first` to the one holding `last`."""
+    return (bucket_start(last, width) - bucket_start(first, width)) // width + 1
+
+
+class Totals:
+    """Running sums for one aggregation bucket."""
+
+    __slots__ = ("count", "risk_sum", "confidence_sum", "freeze_count")
+
+    def __init__(self):
+        self.count = 0
+        self.risk_sum = 0.0
+        self.confidence_sum = 0.0
+        self.freeze_count = 0
+
+    def merge(self, other: "Totals"):
+        self.count += other.count
+        self.risk_sum += other.risk_sum
+        self.confidence_sum += other.confidence_sum
+        self.freeze_count += other.freeze_count
+
+    def add(self, record: dict, sign: int = 1):
+        self.count += sign
+        self.risk_sum += sign * (record.get("risk_score") or 0)
+        self.confidence_sum += sign * (record.get("confident_score") or 0)
+        self.freeze_count += sign * int(bool(record.get("freeze_request")))
+
+    @property
+    def avg_risk(self):
+        return self.risk_sum / self.count if self.count else 0.0
+
+    @property
+    def avg_confidence(self):
+        return self.confidence_sum / self.count if self.count else 0.0
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "avg_risk": round(self.avg_risk, 2),
+            "avg_confidence": round(self.avg_confidence, 2),
+            "freeze_count": self.freeze_count,
+        }
+
+
+class AggregateEngine:
+    """
+    Incrementally maintained summary statistics (global, per project, per user, per day).
+    Seeded once from the store, then updated by every ingest, so summary reads are O(1).
+    With several worker processes each keeps its own copy and folds in the others' writes
+    through sync().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Held while catching up with the store, so no write is folded in twice
+        self._sync_lock = threading.RLock()
+        # Bumped on every change so derived views (e.g. rendered reports) know when to refresh
+        self.generation = 0
+        # Store data version the totals reflect
+        self.version = 0
+        self.reset()
+
+    def reset(self):
+        self.totals = Totals()
+        self.projects = {}
+        self.users = {}
+        self.days = {}
+        # Hourly totals for /api/series: ("all", None), ("project", name) or ("user", name) -> {hour: Totals}
+        self.hours = {}
+
+    def rebuild(self, records):
+        with self._lock:
+            self.generation += 1
+            self.reset()
+            for record in records:
+                self._apply(record, 1)
+
+    def load(self, store):
+        """Rebuild from a consistent snapshot of the store."""
+        with self._sync_lock:
+            version, records = store.versioned_all()
+            self.rebuild(records)
+            self.version = version
+
+    def sync(self, store):
+        """
+        Fold in writes committed since self.version, typically by other worker processes.
+        Returns (version, records folded in): [] when already current, None when the totals
+        had to be rebuilt because records were rewritten or removed.
+        """
+        with self._sync_lock:
+            version, added = store.appended_since(self.version)
+            if version == self.version:
+                return version, []
+            if added is None:
+                self.load(store)
+                return self.version, None
+            self.add_many(added)
+            self.version = version
+            return version, added
+
+    def apply_local(self, store, committed: int, records=None, pairs=None):
+        """
+        Fold in a write this process committed as data version `committed`: either new
+        records or (old, new) rescored pairs. Applied directly when nothing else was written
+        in between, otherwise through sync(). Returns what sync() would.
+        """
+        with self._sync_lock:
+            if committed is None or committed <= self.version:
+                # Already picked up by a sync
+                return self.version, []
+            if committed != self.version + 1:
+                return self.sync(store)
+            if pairs is not None:
+                self.replace_many(pairs)
+                records = [new for _, new in pairs]
+            else:
+                self.add_many(records)
+            self.version = committed
+            return committed, records
+
+    def add(self, record: dict):
+        with self._lock:
+            self._apply(record, 1)
+
+    def add_many(self, records):
+        with self._lock:
+            for record in records:
+                self._apply(record, 1)
+
+    def replace_many(self, pairs):
+        """Swap the contribution of old records for their rescored versions."""
+        with self._lock:
+            for old, new in pairs:
+                self._apply(old, -1)
+                self._apply(new, 1)
+
+    def _apply(self, record: dict, sign: int):
+        self.generation += 1
+        self.totals.add(record, sign)
+        ts = parse_timestamp(record.get("timestamp") or "")
+        buckets_and_keys = [
+            (self.projects, record.get("project")),
+            (self.users, record.get("user")),
+            (self.days, _day(ts)),
+        ]
+        if ts is not None:
+            hour = int(ts // HOUR)
+            for series in (("all", None), ("project", record.get("project")), ("user", record.get("user"))):
+                hours = self.hours.get(series)
+                if hours is None:
+                    hours = self.hours[series] = {}
+                buckets_and_keys.append((hours, hour))
+        for buckets, key in buckets_and_keys:
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = Totals()
+            bucket.add(record, sign)
+            if bucket.count <= 0:
+                del buckets[key]
+
+    def summary(self):
+        """Unrounded global averages plus the number of distinct projects."""
+        with self._lock:
+            return self._summary()
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot()
+
+    def report(self):
+        """Summary and snapshot taken together, tagged with the data version and generation they reflect."""
+        # The version moves under _sync_lock after the totals change under _lock: hold both
+        with self._sync_lock, self._lock:
+            return {
+                "version": self.version,
+                "generation": self.generation,
+                "summary": self._summary(),
+                **self._snapshot(),
+            }
+
+    def series(self, interval: str = "day", group_by: str = None, start=None, end=None,
+               max_points: int = 200, limit: int = 10):
+        """
+        Bucketed count/avg risk/avg confidence/freeze rate over time, overall or per project
+        or user (the `limit` busiest in range), for hours starting in [start, end] (epoch seconds).
+        Buckets are rolled up from the hourly totals; when the range spans more than max_points
+        buckets they are widened to a multiple of the interval, so a response never holds more
+        than limit * max_points points.
+        """
+        first_hour = None if start is None else math.ceil(start / HOUR)
+        last_hour = None if end is None else math.floor(end / HOUR)
+        with self._lock:
+            selected = {}
+            for (dimension, key), hours in self.hours.items():
+                if dimension != (group_by or "all"):
+                    continue
+                in_range = [
+                    (hour, totals) for hour, totals in hours.items()
+                    if (first_hour is None or hour >= first_hour) and (last_hour is None or hour <= last_hour)
+                ]
+                if in_range:
+                    selected[key if group_by else "all"] = in_range
+
+            busiest = sorted(selected, key=lambda k: sum(t.count for _, t in selected[k]), reverse=True)[:limit]
+            base = SERIES_INTERVALS[interval]
+            step = 1
+            hours = [hour for key in busiest for hour, _ in selected[key]]
+            if hours:
+                first, last = min(hours) * HOUR, max(hours) * HOUR
+                step = max(1, math.ceil(_bucket_count(first, last, base) / max_points))
+                # Widened buckets stay epoch-aligned, so the range can straddle one more of them
+                while _bucket_count(first, last, base * step) > max_points:
+                    step += 1
+            width = base * step
+
+            series = {}
+            for key in busiest:
+                buckets = {}
+                for hour, totals in selected[key]:
+                    t = bucket_start(hour * HOUR, width)
+                    if t not in buckets:
+                        buckets[t] = Totals()
+                    buckets[t].merge(totals)
+                series[key] = [_point(t, buckets[t]) for t in sorted(buckets)]
+            version = self.version
+
+        return {
+            "version": version,
+            "interval": interval,
+            "step": step,
+            "bucket_seconds": width,
+            "group_by": group_by,
+            "series_count": len(selected),
+            "series": series,
+        }
+
+    def delta(self, records):
+        """
+        Current totals of just the buckets the given records fall in, shaped like snapshot();
+        buckets that no longer exist map to None.
+        """
+        keys = {"projects": set(), "users": set(), "days": set()}
+        for record in records:
+            keys["projects"].add(record.get("project"))
+            keys["users"].add(record.get("user"))
+            keys["days"].add(day_key(record))
+        with self._lock:
+            delta = {"global": {**self.totals.to_dict(), "project_count": len(self.projects)}}
+            for name, buckets in (("projects", self.projects), ("users", self.users), ("days", self.days)):
+                delta[name] = {
+                    key: buckets[key].to_dict() if key in buckets else None for key in keys[name]
+                }
+            return delta
+
+    def _summary(self):
+        return {
+            "count": self.totals.count,
+            "avg_risk": self.totals.avg_risk,
+            "avg_confidence": self.totals.avg_confidence,
+            "freeze_count": self.totals.freeze_count,
+            "project_count": len(self.projects),
+        }
+
+    def _snapshot(self):
+        return {
+            "global": {**self.totals.to_dict(), "project_count": len(self.projects)},
+            "projects": {k: v.to_dict() for k, v in self.projects.items()},
+            "users": {k: v.to_dict() for k, v in self.users.items()},
+            "days": {k: v.to_dict() for k, v in sorted(self.days.items())},
+        }
+
+
+def _point(start: int, totals: Totals) -> dict:
+    return {
+        "t": datetime.fromtimestamp(start, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        **totals.to_dict(),
+        "freeze_rate": round(totals.freeze_count / totals.count, 4) if totals.count else 0.0,
+    }
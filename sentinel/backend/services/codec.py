@@ -0,0 +1,35 @@
+import json
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # stdlib json, compact separators
+    orjson = None
+
+CODEC = "orjson" if orjson is not None else "json"
+
+
+def dumps(obj) -> bytes:
+    """Compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def dumps_str(obj) -> str:
+    return dumps(obj).decode()
+
+
+def loads(data):
+    """Parse JSON from str or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with the fastest codec available."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
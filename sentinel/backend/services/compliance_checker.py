@@ -1,11 +1,40 @@
+import hashlib
+import json
+import os
 import re
 from datetime import datetime
+from time import perf_counter
+
+from services import metrics
+from services.metrics import PIPELINE_TIMER_SAMPLE, RULE_LATENCY, sampler
+
+_rule_timer_due = sampler(PIPELINE_TIMER_SAMPLE)
 
 AUTHORIZED_AUTHORS = ["huy@gmail.com", "son@gmail.com", "pooja@gmail.com", "kas@gmail.com", "gayan@gmail.com"]
 PROTECTED_DIRS = ["core/", "db/", "auth/"]
 APPROVED_LABELS = ["@approved", "allow-during-freeze", "hotfix"]
 TEMP_FILE_EXTENSIONS = [".tmp", ".bak", "~"]
 PREFIXES = ["fix:", "feat:", "test:", "docs:"]
+RISKY_KEYWORDS = ["temporary", "quick fix", "test only"]
+
+# Bump when the rule logic in RuleSet changes (config changes are versioned automatically)
+ENGINE_VERSION = 1
+
+DEFAULT_RULES = {
+    "authorized_authors": AUTHORIZED_AUTHORS,
+    "protected_dirs": PROTECTED_DIRS,
+    "approved_labels": APPROVED_LABELS,
+    "temp_file_extensions": TEMP_FILE_EXTENSIONS,
+    "prefixes": PREFIXES,
+    "risky_keywords": RISKY_KEYWORDS,
+    "multi_prefix_pattern": r"\b(fix|feat|test|docs):",
+    "message_format": r"^\w+(\(\w+\))?: .+",
+    "min_message_length": 10,
+    "max_message_lines": 100,
+    # Extra rules: {"name", "warning", "factor", "target": "message"|"files", "keywords": [...] or "pattern"}
+    "extra_rules": [],
+}
+
 
 def _rule_intent(text: str):
     """Rule-based commit classification."""
@@ -29,11 +58,177 @@ def _rule_intent(text: str):
     return "other", 0.6
 
 
-def check_compliance(commit_message: str, changed_files: list, pr_title: str = "", pr_labels: list = [], author_email: str = None, timestamp: str = None):
-    labels_lower = [l.lower() for l in (pr_labels or [])]
+def _keyword_regex(keywords, flags=0):
+    """One alternation for a keyword list (longest first), or None when the list is empty."""
+    if not keywords:
+        return None
+    ordered = sorted(set(keywords), key=len, reverse=True)
+    return re.compile("|".join(re.escape(k) for k in ordered), flags)
+
+
+class _Commit:
+    """Per-commit values every rule reads, computed once."""
+
+    __slots__ = ("message", "message_lower", "touches_protected", "has_temp_files",
+                 "files", "author_email", "timestamp")
+
+
+class RuleSet:
+    """
+    Compliance rules compiled from a config dict: frozensets for membership tests,
+    tuples for prefix/suffix checks and precompiled regexes. Rules run in order and
+    each contributes a warning plus a confidence multiplier.
+    """
+
+    def __init__(self, config: dict = None):
+        config = {**DEFAULT_RULES, **(config or {})}
+        # Content hash of the effective config: identifies which rules produced a score
+        digest_input = json.dumps({"engine": ENGINE_VERSION, **config}, sort_keys=True)
+        self.version = hashlib.sha256(digest_input.encode()).hexdigest()[:12]
+        self.authorized_authors = frozenset(config["authorized_authors"])
+        self.protected_dirs = tuple(config["protected_dirs"])
+        self.approved_labels = frozenset(config["approved_labels"])
+        self.temp_file_extensions = tuple(config["temp_file_extensions"])
+        self.prefixes = tuple(config["prefixes"])
+        self.risky_keywords = _keyword_regex(config["risky_keywords"])
+        self.multi_prefix = re.compile(config["multi_prefix_pattern"])
+        self.message_format = re.compile(config["message_format"])
+        self.min_message_length = config["min_message_length"]
+        self.max_message_lines = config["max_message_lines"]
+        self.rules = self._compile(config["extra_rules"])
+
+    def _compile(self, extra_rules):
+        """Build the ordered (name, check, factor) list; check(commit) returns a warning or None."""
+
+        def prefix(c):
+            # Rule 1: Prefix validation
+            if not c.message_lower.startswith(self.prefixes):
+                return "Commit prefix missing or invalid"
+
+        def protected_dirs(c):
+            # Rule 2: Protected directories (approved labels already returned early)
+            if c.touches_protected:
+                return "Protected directory modified without approval"
+
+        def short_message(c):
+            # Rule 3: Empty/short message
+            if len(c.message.strip()) < self.min_message_length:
+                return "Commit message too short"
+
+        def risky_keywords(c):
+            # Rule 4: Risky keywords
+            if self.risky_keywords is not None and self.risky_keywords.search(c.message_lower):
+                return "Contains risky keyword"
+
+        def multiple_prefixes(c):
+            # Rule 5: Multiple prefixes
+            matches = self.multi_prefix.finditer(c.message_lower)
+            if next(matches, None) is not None and next(matches, None) is not None:
+                return "Multiple prefixes detected"
+
+        def temp_files(c):
+            # Rule 6: File type
+            if c.has_temp_files:
+                return "Contains temporary/backup files"
+
+        def author(c):
+            # Rule 7: Author validation
+            if c.author_email and c.author_email not in self.authorized_authors:
+                return f"Unauthorized author: {c.author_email}"
+
+        # Rule 8: Branch protection – handled in main.py / Git workflow
+
+        def message_format(c):
+            # Rule 9: Message format
+            if not self.message_format.match(c.message):
+                return "Message format incorrect"
+
+        def message_length(c):
+            # Rule 10: Commit length (more lines than characters is impossible, so skip the split)
+            if len(c.message) > self.max_message_lines and len(c.message.splitlines()) > self.max_message_lines:
+                return "Commit message too long"
+
+        def timestamp(c):
+            # Rule 11: Timestamp validation
+            if c.timestamp:
+                try:
+                    commit_time = datetime.fromisoformat(c.timestamp.replace("Z", ""))
+                    if commit_time > datetime.now():
+                        return "Commit timestamp is in the future"
+                except Exception:
+                    return "Invalid timestamp"
+
+        rules = [
+            ("prefix", prefix, 0.7),
+            ("protected_dirs", protected_dirs, 0.6),
+            ("short_message", short_message, 0.5),
+            ("risky_keywords", risky_keywords, 0.7),
+            ("multiple_prefixes", multiple_prefixes, 0.85),
+            ("temp_files", temp_files, 0.6),
+            ("author", author, 0.8),
+            ("message_format", message_format, 0.9),
+            ("message_length", message_length, 0.85),
+            ("timestamp", timestamp, 0.9),
+        ]
+        for spec in extra_rules:
+            rules.append((spec["name"], self._extra_rule(spec), spec.get("factor", 0.9)))
+        return rules
+
+    @staticmethod
+    def _extra_rule(spec: dict):
+        """Config-defined rule: a keyword list or regex matched against the message or file paths."""
+        if "keywords" in spec:
+            pattern = _keyword_regex(spec["keywords"], re.IGNORECASE)
+        else:
+            pattern = re.compile(spec["pattern"], re.IGNORECASE)
+        warning = spec.get("warning", spec["name"])
+        if pattern is None:
+            return lambda c: None
+        if spec.get("target", "message") == "files":
+            return lambda c: warning if any(pattern.search(f) for f in c.files) else None
+        return lambda c: warning if pattern.search(c.message) else None
+
+    def prepare(self, commit_message: str, changed_files, author_email, timestamp) -> _Commit:
+        c = _Commit()
+        c.message = commit_message
+        c.message_lower = commit_message.lower()
+        c.files = changed_files or ()
+        c.author_email = author_email
+        c.timestamp = timestamp
+
+        # Single traversal of the file list for both path rules
+        touches_protected = has_temp_files = False
+        for f in c.files:
+            if not touches_protected and f.startswith(self.protected_dirs):
+                touches_protected = True
+            if not has_temp_files and f.endswith(self.temp_file_extensions):
+                has_temp_files = True
+            if touches_protected and has_temp_files:
+                break
+        c.touches_protected = touches_protected
+        c.has_temp_files = has_temp_files
+        return c
+
+
+def load_rules(path=None) -> RuleSet:
+    """
+    Compile the rule set, overriding DEFAULT_RULES with keys from a JSON config file if given.
+    """
+    config = {}
+    if path:
+        with open(path, "r") as f:
+            config = json.load(f)
+    return RuleSet(config)
+
+
+RULES = load_rules(os.getenv("COMPLIANCE_RULES_FILE"))
+
+
+def check_compliance(commit_message: str, changed_files: list, pr_title: str = "", pr_labels: list = [], author_email: str = None, timestamp: str = None, rules: RuleSet = None):
+    rules = rules or RULES
 
     # Rule 0: Label override
-    if any(l in APPROVED_LABELS for l in labels_lower):
+    if pr_labels and not rules.approved_labels.isdisjoint(l.lower() for l in pr_labels):
         return {
             "is_compliant": True,
             "category": "label_override",
@@ -45,65 +240,20 @@ def check_compliance(commit_message: str, changed_files: list, pr_title: str = "
     intent, confidence = _rule_intent(text)
     warnings = []
 
-    # Rule 1: Prefix validation
-    if not any(commit_message.lower().startswith(p) for p in PREFIXES):
-        warnings.append("Commit prefix missing or invalid")
-        confidence *= 0.7
-
-    # Rule 2: Protected directories
-    if any(f.startswith(tuple(PROTECTED_DIRS)) for f in (changed_files or [])):
-        if not any(l in labels_lower for l in APPROVED_LABELS):
-            warnings.append("Protected directory modified without approval")
-            confidence *= 0.6
-
-    # Rule 3: Empty/short message
-    if len(commit_message.strip()) < 10:
-        warnings.append("Commit message too short")
-        confidence *= 0.5
-
-    # Rule 4: Risky keywords
-    risky_keywords = ["temporary", "quick fix", "test only"]
-    if any(k in commit_message.lower() for k in risky_keywords):
-        warnings.append("Contains risky keyword")
-        confidence *= 0.7
-
-    # Rule 5: Multiple prefixes
-    if len(re.findall(r"\b(fix|feat|test|docs):", commit_message.lower())) > 1:
-        warnings.append("Multiple prefixes detected")
-        confidence *= 0.85
-
-    # Rule 6: File type
-    if any(f.endswith(tuple(TEMP_FILE_EXTENSIONS)) for f in (changed_files or [])):
-        warnings.append("Contains temporary/backup files")
-        confidence *= 0.6
-
-    # Rule 7: Author validation
-    if author_email and author_email not in AUTHORIZED_AUTHORS:
-        warnings.append(f"Unauthorized author: {author_email}")
-        confidence *= 0.8
-
-    # Rule 8: Branch protection – handled in main.py / Git workflow
-
-    # Rule 9: Message format
-    if not re.match(r"^\w+(\(\w+\))?: .+", commit_message):
-        warnings.append("Message format incorrect")
-        confidence *= 0.9
-
-    # Rule 10: Commit length
-    if len(commit_message.splitlines()) > 100:
-        warnings.append("Commit message too long")
-        confidence *= 0.85
-
-    # Rule 11: Timestamp validation
-    if timestamp:
-        try:
-            commit_time = datetime.fromisoformat(timestamp.replace("Z",""))
-            if commit_time > datetime.now():
-                warnings.append("Commit timestamp is in the future")
-                confidence *= 0.9
-        except Exception:
-            warnings.append("Invalid timestamp")
-            confidence *= 0.9
+    commit = rules.prepare(commit_message, changed_files, author_email, timestamp)
+    timings = [] if metrics.PIPELINE_TIMERS and _rule_timer_due() else None
+    for name, check, factor in rules.rules:
+        if timings is None:
+            warning = check(commit)
+        else:
+            start = perf_counter()
+            warning = check(commit)
+            timings.append((name, perf_counter() - start))
+        if warning is not None:
+            warnings.append(warning)
+            confidence *= factor
+    if timings:
+        RULE_LATENCY.observe_many(timings)
 
     is_compliant = len(warnings) == 0
     message = " | ".join(warnings) if warnings else f"{intent} allowed"
@@ -0,0 +1,101 @@
+import asyncio
+import threading
+from collections import deque
+
+from services.codec import dumps_str
+
+
+def format_sse(event: str, data, event_id=None) -> str:
+    """One Server-Sent Events frame."""
+    frame = f"event: {event}\n"
+    if event_id is not None:
+        frame += f"id: {event_id}\n"
+    return frame + f"data: {dumps_str(data)}\n\n"
+
+
+class Subscriber:
+    """
+    One stream client: a bounded queue filled from any thread and drained on the event loop.
+    A client that falls maxsize events behind loses its backlog and gets a single "resync"
+    event instead, so a slow reader never holds up ingestion or grows memory.
+    """
+
+    def __init__(self, loop, maxsize: int):
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._loop = loop
+        self._events = deque()
+        self._overflowed = False
+        self._lock = threading.Lock()
+        self._ready = asyncio.Event()
+
+    def put(self, event: str, data, event_id=None):
+        with self._lock:
+            was_empty = not self._events and not self._overflowed
+            if self._overflowed:
+                self.dropped += 1
+            elif len(self._events) >= self.maxsize:
+                self.dropped += len(self._events) + 1
+                self._events.clear()
+                self._overflowed = True
+            else:
+                self._events.append((event, data, event_id))
+        if was_empty:
+            self._loop.call_soon_threadsafe(self._ready.set)
+
+    async def get(self, timeout: float):
+        """Pending (event, data, id) tuples, oldest first; [] when nothing arrived within timeout."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+            if self._overflowed:
+                events.append(("resync", {"dropped": self.dropped}, None))
+                self._overflowed = False
+            self._ready.clear()
+        return events
+
+
+class EventBroker:
+    """Fan-out of write events to /api/stream clients, with a cap on concurrent clients."""
+
+    def __init__(self, max_clients: int = 100, queue_size: int = 256):
+        self.max_clients = max_clients
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return bool(self._subscribers)
+
+    def subscribe(self):
+        """New subscriber bound to the running event loop, or None when at max_clients."""
+        subscriber = Subscriber(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event: str, data, event_id=None):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.put(event, data, event_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "clients": len(self._subscribers),
+                "max_clients": self.max_clients,
+                "queue_size": self.queue_size,
+                "dropped": sum(s.dropped for s in self._subscribers),
+            }
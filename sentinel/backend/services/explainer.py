@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import importlib
+
+from services.cache import payload_digest
+
+
+class Explainer:
+    """Backend that writes the reasoning behind a record's freeze decision."""
+
+    # Part of the cache key: bump it when the backend, model or prompt changes
+    name = "base"
+    # Record fields the explanation depends on, also part of the cache key; None means all of them
+    fields = None
+
+    async def explain(self, record: dict) -> str:
+        raise NotImplementedError
+
+
+class LocalExplainer(Explainer):
+    """Offline template explanations, picked by a hash of the commit so they are deterministic."""
+
+    name = "local-1"
+    fields = ("commit_hash", "commit_message", "risk_score", "confident_score", "freeze_request")
+
+    async def explain(self, record):
+        return local_explanation(record)
+
+
+def local_explanation(record: dict) -> str:
+    risk = record.get("risk_score", 0)
+    conf = record.get("confident_score", 0)
+    freeze = record.get("freeze_request", False)
+    message = record.get("commit_message", "")
+
+    if freeze:
+        reason = (
+            f"The commit '{message}' shows a high risk score ({risk}) and "
+            f"lower confidence ({conf}%). The system recommends a freeze."
+        )
+    else:
+        reason = f"The commit '{message}' is stable with risk {risk} and confidence {conf}%."
+
+    variations = [
+        reason,
+        f"AI analysis: '{message}' classified as {'risky' if freeze else 'stable'} "
+        f"(risk={risk}, confidence={conf}). Decision: {'freeze' if freeze else 'continue'}.",
+        f"This commit {'may cause instability' if freeze else 'is low-risk and stable'} "
+        f"based on metrics and history.",
+    ]
+    seed = str(record.get("commit_hash") or message).encode()
+    return variations[int(hashlib.sha256(seed).hexdigest(), 16) % len(variations)]
+
+
+def open_explainer(backend: str) -> Explainer:
+    """Build the explainer selected by EXPLAINER_BACKEND: "local" or "package.module:factory"."""
+    if backend == "local":
+        return LocalExplainer()
+    if ":" in backend:
+        module, _, attr = backend.partition(":")
+        return getattr(importlib.import_module(module), attr)()
+    raise ValueError(f"Unknown explainer backend: {backend}")
+
+
+class ExplanationService:
+    """
+    Explanations for batches of records. Results are cached per (commit hash, explainer, digest
+    of the record fields the explainer reads), at most `concurrency` explainer calls run at
+    once, and concurrent requests for the same key share a single call.
+    """
+
+    def __init__(self, explainer: Explainer, cache, concurrency: int = 8, timeout: float = 30.0):
+        self.explainer = explainer
+        self.cache = cache
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._inflight = {}
+
+    def key(self, record: dict):
+        """Cache key, or None for records without a real commit hash (never cached)."""
+        commit_hash = record.get("commit_hash")
+        if not commit_hash or commit_hash == "N/A":
+            return None
+        fields = self.explainer.fields
+        inputs = record if fields is None else {f: record.get(f) for f in fields}
+        # Records come from clients: the digest keeps one client's copy from fixing the text for everyone
+        return commit_hash, self.explainer.name, payload_digest(inputs)
+
+    async def _call(self, record, key):
+        async with self._semaphore:
+            text = await asyncio.wait_for(self.explainer.explain(record), self.timeout)
+        if key is not None:
+            self.cache.set(key, text)
+        return text
+
+    async def explain(self, record: dict):
+        """(explanation, cached)."""
+        key = self.key(record)
+        if key is None:
+            return await self._call(record, None), False
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached, True
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.ensure_future(self._call(record, key))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded: a client going away must not cancel a call other requests are waiting on
+        return await asyncio.shield(task), False
+
+    async def explain_many(self, records):
+        """One {"commit_hash", "ai_explanation", "cached"} item per record, in order; failures carry "error"."""
+
+        async def item(record):
+            try:
+                text, cached = await self.explain(record)
+            except Exception as e:
+                error = str(e) or type(e).__name__
+                return {"commit_hash": record.get("commit_hash"), "ai_explanation": None, "error": error}
+            return {"commit_hash": record.get("commit_hash"), "ai_explanation": text, "cached": cached}
+
+        return await asyncio.gather(*(item(r) for r in records))
+
+    def stats(self):
+        return {"explainer": self.explainer.name, "in_flight": len(self._inflight), **self.cache.stats()}
@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+import zlib
+
+from services.codec import dumps_str
+
+# Stable export schema: every row has these columns, in this order, whatever keys a record carries
+EXPORT_FIELDS = [
+    "id",
+    "user",
+    "user_email",
+    "author_email",
+    "project",
+    "branch",
+    "commit_hash",
+    "commit_message",
+    "repo_url",
+    "timestamp",
+    "lines_changed",
+    "prev_bugs",
+    "test_coverage",
+    "risk_score",
+    "confident_score",
+    "freeze_request",
+    "feedback",
+    "factor_impact",
+    "file_added",
+    "file_removed",
+    "file_modified",
+    "score_version",
+]
+
+
+def _flatten(record: dict):
+    """Project a record onto EXPORT_FIELDS; lists/dicts become JSON text for CSV cells."""
+    row = {}
+    for field in EXPORT_FIELDS:
+        value = record.get(field)
+        if isinstance(value, (list, dict)):
+            value = json.dumps(value)
+        row[field] = value
+    return row
+
+
+def csv_chunks(batches):
+    """Yield CSV text: the header, then one chunk per batch of records."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(_flatten(r) for r in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def ndjson_chunks(batches):
+    """Yield newline-delimited JSON, one object per record, keeping the stable schema."""
+    for batch in batches:
+        yield "".join(
+            dumps_str({f: r.get(f) for f in EXPORT_FIELDS}) + "\n" for r in batch
+        )
+
+
+def gzip_chunks(chunks):
+    """Gzip-compress a text stream incrementally."""
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+EXPORT_FORMATS = {
+    "csv": (csv_chunks, "text/csv", "csv"),
+    "ndjson": (ndjson_chunks, "application/x-ndjson", "ndjson"),
+}
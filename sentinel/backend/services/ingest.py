@@ -0,0 +1,509 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from services.cache import payload_digest
+from services.codec import dumps, loads
+from services.compliance_checker import RULES, check_compliance
+from services.metrics import disable_pipeline_timers
+from services.storage import atomic_write, dedup_key, file_lock
+from services.risk_predictor import (
+    FACTOR_NAMES,
+    MODEL_VERSION,
+    predict_risk_score,
+    predict_risk_scores_columnar,
+    extract_features,
+    extract_features_columnar,
+)
+
+
+# Stamped on every record so rescoring can find the ones produced by older rules/models
+SCORING_VERSION = f"{MODEL_VERSION}+rules-{RULES.version}"
+
+# Payload fields /api/analyze scores from but does not otherwise keep on the record
+SCORE_INPUT_KEYS = ("lines_changed", "prev_bugs", "test_coverage", "files", "pr_title", "pr_labels")
+
+# Fields of a record written by score_payload, before score_inputs and score_version
+ANALYZE_FIELDS = frozenset((
+    "id", "user", "user_email", "project", "commit_message", "commit_hash", "repo_url", "risk_score",
+    "confident_score", "freeze_request", "feedback", "factor_impact", "file_added", "file_removed",
+    "file_modified", "timestamp",
+))
+
+
+def analysis_key(payload: dict):
+    """Memoization key: commit hash + payload content + the scoring version that would run."""
+    return payload.get("commit_hash"), payload_digest(payload), SCORING_VERSION
+
+
+def score_payload(payload: dict) -> dict:
+    """Score an /api/analyze payload into a processed record."""
+    compliance = check_compliance(
+        commit_message=payload.get("commit_message", ""),
+        changed_files=payload.get("file_modified", []),
+        pr_title=payload.get("pr_title", ""),
+        pr_labels=payload.get("pr_labels", []),
+        author_email=payload.get("user_email"),
+        timestamp=payload.get("timestamp")
+    )
+
+    features = extract_features(payload)
+    risk = predict_risk_score(features)
+
+    freeze_request = risk["risk_score"] > 50 or not compliance["is_compliant"]
+
+    return {
+        "id": payload.get("id") or int(os.urandom(1)[0]),
+        "user": payload.get("user", "anonymous"),
+        "user_email": payload.get("user_email"),
+        "project": payload.get("project", "Unknown"),
+        "commit_message": payload.get("commit_message", ""),
+        "commit_hash": payload.get("commit_hash", "N/A"),
+        "repo_url": payload.get("repo_url", ""),
+        "risk_score": risk["risk_score"],
+        "confident_score": int(compliance.get("confidence", 0) * 100),
+        "freeze_request": freeze_request,
+        "feedback": compliance.get("message", ""),
+        "factor_impact": risk.get("factor_impact"),
+        "file_added": payload.get("file_added", []),
+        "file_removed": payload.get("file_removed", []),
+        "file_modified": payload.get("file_modified", []),
+        "timestamp": payload.get("timestamp"),
+        "score_inputs": {k: payload[k] for k in SCORE_INPUT_KEYS if k in payload},
+        "score_version": SCORING_VERSION,
+    }
+
+
+def score_payloads(payloads: list) -> list:
+    """Process-pool entry point: score a chunk of /api/analyze payloads."""
+    return [score_payload(p) for p in payloads]
+
+
+def score_raw_commit(commit: dict) -> dict:
+    """Score one raw commit (raw_commits.json schema) into a processed record."""
+    features = extract_features(_raw_features(commit))
+    risk_result = predict_risk_score(features)
+
+    compliance = check_compliance(
+        commit_message=commit.get("commit_message", ""),
+        changed_files=commit.get("file_modified", []),
+        pr_title=commit.get("pr_title", ""),
+        pr_labels=commit.get("pr_labels", []),
+        author_email=commit.get("user_email"),
+        timestamp=commit.get("timestamp")
+    )
+
+    return _record(commit, risk_result["risk_score"], risk_result.get("factor_impact"), compliance)
+
+
+def _record(commit: dict, risk_score, factor_impact: dict, compliance: dict) -> dict:
+    freeze_request = risk_score > 50 or not compliance["is_compliant"]
+
+    return {
+        **commit,
+        "risk_score": round(risk_score, 1),
+        "confident_score": int(compliance.get("confidence", 0) * 100),
+        "freeze_request": freeze_request,
+        "feedback": compliance["message"],
+        "factor_impact": factor_impact,
+        "score_version": SCORING_VERSION,
+    }
+
+
+def _raw_features(commit: dict) -> dict:
+    return {
+        "lines_changed": commit.get("lines_changed", 40),
+        "prev_bugs": commit.get("prev_bugs", 1),
+        "test_coverage": commit.get("test_coverage", 90),
+        "files": commit.get("file_modified", []),
+    }
+
+
+def score_chunk(commits: list) -> list:
+    """
+    Process-pool entry point: score a chunk of raw commits.
+    Risk is computed column-wise for the whole chunk; same records as score_raw_commit.
+    """
+    risk = predict_risk_scores_columnar(extract_features_columnar([_raw_features(c) for c in commits]))
+    impacts = zip(*(risk[name] for name in FACTOR_NAMES))
+    return [
+        _record(
+            commit,
+            risk_score,
+            dict(zip(FACTOR_NAMES, impact)),
+            check_compliance(
+                commit_message=commit.get("commit_message", ""),
+                changed_files=commit.get("file_modified", []),
+                pr_title=commit.get("pr_title", ""),
+                pr_labels=commit.get("pr_labels", []),
+                author_email=commit.get("user_email"),
+                timestamp=commit.get("timestamp")
+            ),
+        )
+        for commit, risk_score, impact in zip(commits, risk["risk_score"], impacts)
+    ]
+
+
+def rescore_record(record: dict) -> dict:
+    """Recompute a stored record with the current rules, from the inputs it was scored on."""
+    # score_payload always writes score_inputs and _record never does, so since scores are
+    # versioned the two tell where a record came from
+    if "score_inputs" in record:
+        return score_payload({**record, **record["score_inputs"]})
+    if record.get("score_version") is None and _legacy_from_analyze(record):
+        # Analyzed before score_inputs were kept: the stored fields are all there is, and
+        # the raw-commit defaults (40 lines, 1 prior bug, 90% coverage) never applied to it
+        return score_payload(record)
+    return score_raw_commit(record)
+
+
+def _legacy_from_analyze(record: dict) -> bool:
+    """
+    Best guess for an unversioned record: /api/analyze wrote exactly ANALYZE_FIELDS (user_email
+    always, possibly null), while raw commits keep their own fields such as branch or author_email.
+    """
+    return "user_email" in record and record.keys() <= ANALYZE_FIELDS
+
+
+def rescore_chunk(pairs: list) -> list:
+    """Process-pool entry point: rescore (key, record) pairs from CommitStore.iter_stale."""
+    return [(key, rescore_record(record)) for key, record in pairs]
+
+
+def iter_json_array(path, read_size: int = 1 << 16):
+    """
+    Yield the elements of a top-level JSON array one by one without loading the whole file.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    started = False
+    with open(path, "r") as f:
+        while True:
+            # Skip the opening bracket and separators between elements
+            while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == "," or (buffer[pos] == "[" and not started)):
+                started = started or buffer[pos] == "["
+                pos += 1
+
+            if pos < len(buffer):
+                if buffer[pos] == "]":
+                    return
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                    # A value ending exactly at the buffer edge may be truncated (e.g. a number)
+                    if end < len(buffer) or eof:
+                        yield value
+                        pos = end
+                        continue
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+            elif eof:
+                return
+
+            chunk = f.read(read_size)
+            if not chunk:
+                eof = True
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+
+class NDJSONDecoder:
+    """
+    Incremental NDJSON parser: feed() bytes as they arrive and get back (value, end) for every
+    complete line, `end` being the byte offset just past its newline. Only the current partial
+    line is buffered. Blank lines are skipped; lines that are not a JSON object are skipped
+    and noted in `errors` (the first MAX_ERRORS of them, with the line number counted from
+    where decoding started and the line's byte offset).
+    A line longer than max_line is skipped the same way (its bytes are dropped up to the next
+    newline), unless strict: then the next feed()/finish() raises ValueError, after the lines
+    before it were handed out.
+    """
+
+    MAX_ERRORS = 20
+
+    def __init__(self, offset: int = 0, max_line: int = 1 << 20, strict: bool = False):
+        # Start of the first line not yet consumed: where a checkpoint can safely resume
+        self.offset = offset
+        self.max_line = max_line
+        self.strict = strict
+        self.lines = 0
+        self.invalid = 0
+        self.errors = []
+        self._buffer = b""
+        # Offset of _buffer[0] (ahead of self.offset while an over-long line is being dropped)
+        self._position = offset
+        self._dropping = False
+        self._overflow = None
+
+    def feed(self, data: bytes):
+        if self._overflow:
+            raise ValueError(self._overflow)
+        if self._dropping:
+            newline = data.find(b"\n")
+            if newline < 0:
+                self._position += len(data)
+                return []
+            self._dropping = False
+            self._position += newline + 1
+            self.offset = self._position
+            data = data[newline + 1:]
+
+        buffer = self._buffer + data
+        items = []
+        start = 0
+        while True:
+            newline = buffer.find(b"\n", start)
+            if newline < 0:
+                break
+            line = buffer[start:newline]
+            start = newline + 1
+            self.lines += 1
+            if len(line) > self.max_line:
+                message = f"NDJSON line {self.lines} is longer than {self.max_line} bytes"
+                if self.strict:
+                    # Resume point: the start of the long line, after the items handed out
+                    self._position += start - len(line) - 1
+                    self.offset = self._position
+                    self._buffer = b""
+                    self._overflow = message
+                    return items
+                self._error(ValueError(message), self._position + start - len(line) - 1)
+            elif line.strip():
+                try:
+                    value = loads(line)
+                except ValueError as e:
+                    value = e
+                if isinstance(value, dict):
+                    items.append((value, self._position + start))
+                else:
+                    self._error(value, self._position + start - len(line) - 1)
+        self._position += start
+        self.offset = self._position
+        self._buffer = buffer[start:]
+
+        if len(self._buffer) > self.max_line:
+            self.lines += 1
+            message = f"NDJSON line {self.lines} is longer than {self.max_line} bytes"
+            if self.strict:
+                self._overflow = message
+            else:
+                self._error(ValueError(message), self._position)
+                self._position += len(self._buffer)
+                self._dropping = True
+            self._buffer = b""
+        return items
+
+    def finish(self):
+        """Items of a final line that has no trailing newline (request bodies, not spools)."""
+        if self._overflow:
+            raise ValueError(self._overflow)
+        return self.feed(b"\n") if self._buffer.strip() else []
+
+    def _error(self, value, offset: int):
+        self.invalid += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            reason = str(value) if isinstance(value, ValueError) else "expected a JSON object"
+            self.errors.append({"line": self.lines, "offset": offset, "error": reason})
+
+
+def iter_ndjson(path, decoder: NDJSONDecoder, read_size: int = 1 << 16):
+    """
+    (commit, end offset) for each complete line of an NDJSON file, from decoder.offset on.
+    A last line still missing its newline (a producer mid-write) is left for the next run.
+    """
+    with open(path, "rb") as f:
+        f.seek(decoder.offset)
+        while True:
+            data = f.read(read_size)
+            if not data:
+                return
+            yield from decoder.feed(data)
+
+
+class Spool:
+    """
+    Append-only NDJSON input file with a checkpointed read offset, so an interrupted ingest
+    resumes at the first commit it had not stored. The checkpoint lives next to the file
+    (<name>.offset) and records the file's inode, so a replaced or truncated spool starts over.
+    Producers append whole lines while holding <name>.lock (see append).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.checkpoint_path = self.path.with_name(self.path.name + ".offset")
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def offset(self) -> int:
+        try:
+            saved = loads(self.checkpoint_path.read_bytes())
+            st = os.stat(self.path)
+        except (FileNotFoundError, ValueError):
+            return 0
+        if saved.get("inode") != st.st_ino or saved.get("offset", 0) > st.st_size:
+            return 0
+        return saved["offset"]
+
+    def commit(self, offset: int):
+        """Record that every line before `offset` is stored."""
+        atomic_write(self.checkpoint_path, dumps({"inode": os.stat(self.path).st_ino, "offset": offset}))
+
+    def pending_bytes(self) -> int:
+        try:
+            return os.stat(self.path).st_size - self.offset()
+        except FileNotFoundError:
+            return 0
+
+    def append(self, commits):
+        """Append commits as NDJSON lines."""
+        with file_lock(self.lock_path), open(self.path, "ab") as f:
+            for commit in commits:
+                f.write(dumps(commit) + b"\n")
+
+    def compact(self):
+        """Empty the spool once everything in it is ingested, so it does not grow forever."""
+        with file_lock(self.lock_path):
+            if self.exists() and self.pending_bytes() == 0 and os.stat(self.path).st_size:
+                os.truncate(self.path, 0)
+                self.commit(0)
+
+
+def chunked(iterable, size: int):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _run_chunks(chunks, fn, handle, workers: int):
+    """Apply fn to each chunk (on a process pool when workers > 1) and hand results to handle, in order."""
+    if workers <= 1:
+        for chunk in chunks:
+            handle(fn(chunk))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=disable_pipeline_timers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(fn, chunk))
+            if len(pending) >= workers * 2:
+                handle(pending.popleft().result())
+        while pending:
+            handle(pending.popleft().result())
+
+
+def ingest_stream(commits, store, job=None, workers: int = 1, chunk_size: int = 500, on_inserted=None,
+                  cache=None, score=score_chunk, checkpoint=None):
+    """
+    Score raw commits chunk by chunk and merge each chunk into the store.
+    Before scoring, commits whose hash is already stored are dropped, and commits without
+    a hash reuse cached analyses. Commits with a hash skip the cache: the content digest
+    costs about as much as scoring, and an unknown hash is practically never cached.
+    The rest is scored with `score`, across a process pool when workers > 1 (bounded
+    in-flight, in order). Returns the number of commits read.
+    With `checkpoint`, commits are (commit, position) pairs and checkpoint(position) is
+    called once every commit up to that position is stored.
+    """
+    read_total = 0
+    pending_keys = deque()
+    # [position, stored] per chunk, in read order; the chunks still being scored, in order
+    positions = deque()
+    scoring = deque()
+
+    def advance_checkpoint():
+        position = None
+        while positions and positions[0][1]:
+            position = positions.popleft()[0]
+        if position is not None:
+            checkpoint(position)
+
+    def store_records(records, read):
+        inserted = store.extend(records) if records else []
+        if job is not None:
+            job.advance(read, len(inserted))
+        if on_inserted is not None and inserted:
+            on_inserted(inserted)
+
+    def store_scored(records):
+        keys = pending_keys.popleft()
+        if cache is not None:
+            for key, record in zip(keys, records):
+                if key is not None:
+                    cache.set(key, record)
+        store_records(records, len(records))
+        if checkpoint is not None:
+            scoring.popleft()[1] = True
+            advance_checkpoint()
+
+    def chunks_to_score():
+        nonlocal read_total
+        for chunk in chunked(commits, chunk_size):
+            mark = None
+            if checkpoint is not None:
+                mark = [chunk[-1][1], False]
+                positions.append(mark)
+                chunk = [commit for commit, _ in chunk]
+            read_total += len(chunk)
+            known = store.known_hashes(c.get("commit_hash") for c in chunk)
+            fresh = [c for c in chunk if dedup_key(c) is None or c["commit_hash"] not in known]
+
+            hits, misses, keys = [], [], []
+            for commit in fresh:
+                key = analysis_key(commit) if cache is not None and dedup_key(commit) is None else None
+                cached = cache.get(key) if key is not None else None
+                if cached is not None:
+                    hits.append(cached)
+                else:
+                    misses.append(commit)
+                    keys.append(key)
+
+            # Known and cached commits never reach the scorer
+            store_records(hits, len(chunk) - len(misses))
+            if misses:
+                pending_keys.append(keys)
+                if mark is not None:
+                    scoring.append(mark)
+                yield misses
+            elif mark is not None:
+                mark[1] = True
+                advance_checkpoint()
+
+    _run_chunks(chunks_to_score(), score, store_scored, workers)
+    return read_total
+
+
+def rescore_stream(store, job=None, workers: int = 1, chunk_size: int = 500, on_updated=None):
+    """
+    Rescore every record whose score_version is not SCORING_VERSION, in parallel batches.
+    Up-to-date records are never read back or rewritten. Returns the number rescored.
+    on_updated receives (old_record, new_record) pairs.
+    """
+    rescored = 0
+    originals = {}
+
+    def write_chunk(pairs):
+        nonlocal rescored
+        store.update_many(pairs)
+        rescored += len(pairs)
+        if job is not None:
+            job.advance(len(pairs), len(pairs))
+        if on_updated is not None:
+            on_updated([(originals.pop(key), record) for key, record in pairs])
+
+    def chunks():
+        for batch in store.iter_stale(SCORING_VERSION, batch_size=chunk_size):
+            originals.update(batch)
+            yield batch
+
+    _run_chunks(chunks(), rescore_chunk, write_chunk, workers)
+    return rescored
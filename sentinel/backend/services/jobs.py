@@ -0,0 +1,160 @@
+import queue
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+
+
+class Job:
+    """
+    Progress and outcome of one long-running operation (e.g. a batch ingest).
+    Given a store, the status is saved there so any worker process can report it.
+    """
+
+    # Progress updates are saved at most this often; state changes are saved right away
+    SAVE_INTERVAL_SEC = 1.0
+
+    def __init__(self, kind: str, store=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.processed = 0
+        self.inserted = 0
+        self.result = None
+        self.error = None
+        self._done = threading.Event()
+        self._store = store
+        self._saved_at = 0.0
+
+    def save(self, force: bool = True):
+        if self._store is None:
+            return
+        now = time.monotonic()
+        if force or now - self._saved_at >= self.SAVE_INTERVAL_SEC:
+            self._saved_at = now
+            self._store.save_job(self.to_dict())
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until the job is done or failed."""
+        return self._done.wait(timeout)
+
+    def start(self):
+        self.status = "running"
+        self.started_at = time.time()
+        self.save()
+
+    def advance(self, processed: int, inserted: int = 0):
+        self.processed += processed
+        self.inserted += inserted
+        self.save(force=False)
+
+    def finish(self, result=None):
+        self.status = "done"
+        self.result = result
+        self.finished_at = time.time()
+        self.save()
+        self._done.set()
+
+    def fail(self, error: str):
+        self.status = "failed"
+        self.error = error
+        self.finished_at = time.time()
+        self.save()
+        self._done.set()
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def to_dict(self):
+        elapsed = self.elapsed
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "elapsed_sec": round(elapsed, 3),
+            "commits_per_sec": round(self.processed / elapsed, 1) if elapsed else 0.0,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobRegistry:
+    """Bounded, thread-safe lookup of recent jobs by id (shared through the store when given)."""
+
+    def __init__(self, max_jobs: int = 200, store=None):
+        self.max_jobs = max_jobs
+        self.store = store
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, kind: str) -> Job:
+        job = Job(kind, store=self.store)
+        job.save()
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id: str):
+        """to_dict() of a job started by this process or, via the store, by another one."""
+        job = self.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return self.store.load_job(job_id) if self.store is not None else None
+
+
+class JobQueue:
+    """
+    In-process background queue: submit() returns a Job immediately and worker threads run it.
+    Submissions with the same key coalesce onto the job that is still waiting in the queue,
+    so repeated clicks trigger at most one run behind the one in progress.
+    """
+
+    def __init__(self, registry: JobRegistry, workers: int = 1):
+        self.registry = registry
+        self._queue = queue.Queue()
+        self._pending = {}
+        self._lock = threading.Lock()
+        for i in range(workers):
+            threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True).start()
+
+    def submit(self, key: str, fn, kind: str = None) -> Job:
+        """Queue fn(job) under key; returns the already-queued job for that key if there is one."""
+        with self._lock:
+            job = self._pending.get(key)
+            if job is not None:
+                return job
+            job = self.registry.create(kind or key)
+            self._pending[key] = job
+        self._queue.put((key, job, fn))
+        return job
+
+    def _worker(self):
+        while True:
+            key, job, fn = self._queue.get()
+            with self._lock:
+                # From here on new submissions queue a fresh follow-up run
+                if self._pending.get(key) is job:
+                    del self._pending[key]
+            job.start()
+            try:
+                job.finish(fn(job))
+            except Exception as e:
+                traceback.print_exc()
+                job.fail(str(e))
+            finally:
+                self._queue.task_done()
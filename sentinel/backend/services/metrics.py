@@ -0,0 +1,236 @@
+import functools
+import itertools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from starlette.routing import Match
+
+# Pipeline timers (storage, features, scoring, each compliance rule); request metrics are always on
+PIPELINE_TIMERS = os.getenv("PIPELINE_TIMERS", "1") != "0"
+# Per-commit timers (features, risk, rules) only time 1 call in N: timing costs about as much as the work
+PIPELINE_TIMER_SAMPLE = max(1, int(os.getenv("PIPELINE_TIMER_SAMPLE", "16")))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Metric:
+    """Base for labelled metrics: one series per tuple of label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items(), key=lambda kv: tuple(map(str, kv[0])))
+            for labels, value in series:
+                lines.extend(self._render_series(labels, value))
+        return lines
+
+    def _render_series(self, labels, value):
+        yield f"{self.name}{_label_text(self.labelnames, labels)} {value}"
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def add(self, amount, *labels):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+
+class Summary(Metric):
+    """Count and sum only: cheap enough for per-rule timings on every commit."""
+
+    kind = "summary"
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0, 0.0]
+            series[0] += 1
+            series[1] += value
+
+    def observe_many(self, observations):
+        """Record (label, value) pairs under one lock acquisition (single-label summaries)."""
+        with self._lock:
+            for label, value in observations:
+                series = self._series.get((label,))
+                if series is None:
+                    series = self._series[(label,)] = [0, 0.0]
+                series[0] += 1
+                series[1] += value
+
+    def _render_series(self, labels, value):
+        text = _label_text(self.labelnames, labels)
+        yield f"{self.name}_count{text} {value[0]}"
+        yield f"{self.name}_sum{text} {value[1]:.9f}"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, +Inf last, then the sum
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def _render_series(self, labels, value):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), value[:-1]):
+            cumulative += count
+            yield f"{self.name}_bucket{_label_text(self.labelnames + ('le',), labels + (bound,))} {cumulative}"
+        text = _label_text(self.labelnames, labels)
+        yield f"{self.name}_count{text} {cumulative}"
+        yield f"{self.name}_sum{text} {value[-1]:.9f}"
+
+
+REGISTRY = []
+
+REQUEST_LATENCY = Histogram(
+    "sentinel_http_request_duration_seconds", "Time to send the full response.", ("method", "route", "status")
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "sentinel_http_requests_in_flight", "Requests currently being handled.", ("method", "route")
+)
+STAGE_LATENCY = Histogram(
+    "sentinel_stage_duration_seconds",
+    f"Time spent in pipeline stages (storage, serialization; per-commit stages 1 in {PIPELINE_TIMER_SAMPLE} calls).",
+    ("stage",),
+)
+RULE_LATENCY = Summary(
+    "sentinel_compliance_rule_duration_seconds",
+    f"Time spent evaluating each compliance rule (1 in {PIPELINE_TIMER_SAMPLE} commits).",
+    ("rule",),
+)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Record the duration of the enclosed block under STAGE_LATENCY{stage}."""
+    if not PIPELINE_TIMERS:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage)
+
+
+def disable_pipeline_timers():
+    """
+    Turn pipeline timers off in this process. Used as the process pool initializer: worker
+    timings never reach the server's registry, and a worker forked while another thread
+    held a metric lock would block on it forever.
+    """
+    global PIPELINE_TIMERS
+    PIPELINE_TIMERS = False
+
+
+def sampler(every: int):
+    """Callable that is True once every `every` calls."""
+    calls = itertools.count()
+    return lambda: next(calls) % every == 0
+
+
+def timed(stage: str, sample: int = 1):
+    """
+    Decorator form of stage_timer that times 1 call in `sample`; returns the function
+    untouched when timers are off at import time.
+    """
+
+    def decorate(fn):
+        if not PIPELINE_TIMERS:
+            return fn
+        due = sampler(sample)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not PIPELINE_TIMERS or not due():
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                STAGE_LATENCY.observe(time.perf_counter() - start, stage)
+        return wrapper
+    return decorate
+
+
+def render_metrics() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: per-route latency histogram and in-flight gauge. Routes are labelled by
+    their path template (/api/jobs/{job_id}), so ids in URLs don't create new series.
+    """
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = routes
+
+    def route_of(self, scope):
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method, route = scope["method"], self.route_of(scope)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.add(1, method, route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.add(-1, method, route)
+            REQUEST_LATENCY.observe(time.perf_counter() - start, method, route, status)
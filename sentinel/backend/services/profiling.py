@@ -0,0 +1,136 @@
+import cProfile
+import functools
+import inspect
+import io
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextvars import ContextVar
+
+from fastapi.routing import APIRoute
+
+# Off unless PROFILE_ENABLED=1; then a request is profiled when it sends "X-Profile: 1"
+# or is picked by PROFILE_SAMPLE_RATE (0.0-1.0)
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "0") == "1"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_TOP = 40
+
+_active = ContextVar("active_profile", default=None)
+
+
+def profiled(endpoint):
+    """
+    Wrap an endpoint so a profiler set up by ProfilingMiddleware runs on the thread that executes
+    it (sync endpoints run in the threadpool, out of reach of a profiler started in middleware).
+    """
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            profiler = _active.get()
+            if profiler is None:
+                return await endpoint(*args, **kwargs)
+            profiler.enable()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                profiler.disable()
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            profiler = _active.get()
+            if profiler is None:
+                return endpoint(*args, **kwargs)
+            profiler.enable()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                profiler.disable()
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """Route class that makes every endpoint profileable (see profiled)."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, profiled(endpoint), **kwargs)
+
+
+class ProfileStore:
+    """The most recent request profiles, rendered as pstats text."""
+
+    def __init__(self, maxsize: int = 50):
+        self.maxsize = maxsize
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, method: str, path: str, duration: float, profiler: cProfile.Profile, profile_id: str):
+        out = io.StringIO()
+        try:
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        except TypeError:  # the endpoint never ran (404, rejected request)
+            out.write("No profile data.\n")
+        with self._lock:
+            self._profiles[profile_id] = {
+                "id": profile_id,
+                "method": method,
+                "path": path,
+                "duration_ms": round(duration * 1000, 2),
+                "created_at": time.time(),
+                "stats": out.getvalue(),
+            }
+            while len(self._profiles) > self.maxsize:
+                self._profiles.popitem(last=False)
+
+    def list(self):
+        with self._lock:
+            return [
+                {k: v for k, v in p.items() if k != "stats"} for p in reversed(self._profiles.values())
+            ]
+
+    def get(self, profile_id: str):
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+
+PROFILES = ProfileStore()
+
+
+class ProfilingMiddleware:
+    """
+    Start a cProfile for selected requests and file the result in PROFILES; the response of
+    a profiled request carries its id in X-Profile-Id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def wanted(self, scope) -> bool:
+        if not PROFILE_ENABLED or scope["type"] != "http":
+            return False
+        headers = dict(scope["headers"])
+        return headers.get(b"x-profile") == b"1" or random.random() < PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if not self.wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = cProfile.Profile()
+        profile_id = uuid.uuid4().hex[:12]
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message["headers"], (b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        token = _active.set(profiler)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _active.reset(token)
+            PROFILES.add(scope["method"], scope["path"], time.perf_counter() - start, profiler, profile_id)
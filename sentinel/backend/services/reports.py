@@ -0,0 +1,97 @@
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+# Bump when the PDF layout changes so cached copies and client ETags are invalidated
+REPORT_LAYOUT_VERSION = 2
+
+TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1f2937")),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("FONTSIZE", (0, 0), (-1, -1), 9),
+    ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
+    ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f3f4f6")]),
+    ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#d1d5db")),
+])
+
+
+def _breakdown_table(title: str, buckets: dict, styles):
+    """Per-bucket table (projects or users), most freeze requests first."""
+    rows = [[title, "Commits", "Avg Risk", "Avg Confidence", "Freezes", "Freeze Rate"]]
+    ordered = sorted(buckets.items(), key=lambda kv: (-kv[1]["freeze_count"], -kv[1]["count"], str(kv[0])))
+    for name, totals in ordered:
+        rate = totals["freeze_count"] / totals["count"] * 100 if totals["count"] else 0.0
+        rows.append([
+            # Names come from commit payloads; Paragraph parses markup, so escape them
+            Paragraph(escape(str(name)), styles["Normal"]),
+            totals["count"],
+            f"{totals['avg_risk']:.1f}%",
+            f"{totals['avg_confidence']:.1f}%",
+            totals["freeze_count"],
+            f"{rate:.0f}%",
+        ])
+    table = Table(rows, colWidths=[150, 55, 60, 85, 55, 65], repeatRows=1)
+    table.setStyle(TABLE_STYLE)
+    return table
+
+
+def render_summary_pdf(report: dict) -> bytes:
+    """Render AggregateEngine.report() as the summary PDF, with per-project and per-user tables."""
+    summary = report["summary"]
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer)
+    styles = getSampleStyleSheet()
+
+    content = [
+        Paragraph("<b>Sentinel AI Report Summary</b>", styles["Title"]),
+        Spacer(1, 20),
+        Paragraph(f"Projects Analyzed: {summary['project_count']}", styles["Normal"]),
+        Paragraph(f"Average Risk Score: {summary['avg_risk']:.1f}%", styles["Normal"]),
+        Paragraph(f"Average Confidence Score: {summary['avg_confidence']:.1f}%", styles["Normal"]),
+        Paragraph(f"Freeze Requests: {summary['freeze_count']}", styles["Normal"]),
+        Spacer(1, 20),
+        Paragraph("Projects", styles["Heading2"]),
+        _breakdown_table("Project", report["projects"], styles),
+        Spacer(1, 20),
+        Paragraph("Freeze Requests by User", styles["Heading2"]),
+        _breakdown_table("User", report["users"], styles),
+        Spacer(1, 20),
+        Paragraph("Generated automatically by Sentinel Analytics Dashboard.", styles["Italic"]),
+    ]
+
+    doc.build(content)
+    return buffer.getvalue()
+
+
+class ReportCache:
+    """
+    Rendered reports keyed by data version. Rendering runs on a background thread, and
+    concurrent requests for the same version share one render instead of each building a PDF.
+    """
+
+    def __init__(self, render, maxsize: int = 4, workers: int = 1):
+        self.render = render
+        self.maxsize = maxsize
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report")
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, load):
+        """Future for the report at key; load() supplies the render input on a miss."""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None and not (future.done() and future.exception() is not None):
+                self._futures.move_to_end(key)
+                return future
+            future = self._executor.submit(lambda: self.render(load()))
+            self._futures[key] = future
+            while len(self._futures) > self.maxsize:
+                self._futures.popitem(last=False)
+            return future
@@ -1,3 +1,26 @@
+try:
+    import numpy as np
+except ImportError:  # batch scoring falls back to the scalar path
+    np = None
+
+from services.metrics import PIPELINE_TIMER_SAMPLE, timed
+
+# Bump whenever the heuristics below change so stored scores are re-computed
+MODEL_VERSION = "heuristic-1"
+
+# Same keys, order and defaults as extract_features
+FEATURE_DEFAULTS = {
+    "lines_changed": 0,
+    "prev_bugs": 0,
+    "test_coverage": 100,
+    "touches_core": 0,
+    "num_files_modified": 0,
+}
+
+FACTOR_NAMES = ("lines_changed", "touches_core", "prev_bugs", "test_coverage", "num_files_modified")
+
+
+@timed("extract_features", sample=PIPELINE_TIMER_SAMPLE)
 def extract_features(payload: dict):
     """Convert commit info into risk-related features."""
     files = payload.get("files", [])
@@ -10,6 +33,21 @@ def extract_features(payload: dict):
     }
 
 
+@timed("extract_features_columnar")
+def extract_features_columnar(payloads):
+    """Columnar extract_features: one list per feature, aligned with payloads."""
+    columns = {name: [] for name in FEATURE_DEFAULTS}
+    for payload in payloads:
+        files = payload.get("files", [])
+        columns["lines_changed"].append(payload.get("lines_changed", 0))
+        columns["prev_bugs"].append(payload.get("prev_bugs", 0))
+        columns["test_coverage"].append(payload.get("test_coverage", 100))
+        columns["touches_core"].append(int(any(f.startswith(("core/", "db/")) for f in files)))
+        columns["num_files_modified"].append(len(files))
+    return columns
+
+
+@timed("predict_risk_score", sample=PIPELINE_TIMER_SAMPLE)
 def predict_risk_score(features: dict):
     """Heuristic-only risk score prediction with detailed factor impact."""
     safety = 100.0
@@ -65,3 +103,86 @@ def predict_risk_score(features: dict):
         "factor_impact": factor_impact,
         "message": f"Heuristic risk: {risk:.2f}%",
     }
+
+
+@timed("predict_risk_scores_columnar")
+def predict_risk_scores_columnar(columns: dict):
+    """
+    Vectorized core of predict_risk_score over the output of extract_features_columnar.
+    Returns columns instead of per-commit dicts: "risk_score" plus one list per factor_impact
+    key, with the same values (and int/float types) as the scalar function.
+    """
+    n = len(next(iter(columns.values()), []))
+    if np is None:
+        rows = [{name: columns[name][i] for name in columns} for i in range(n)]
+        results = [predict_risk_score(f) for f in rows]
+        out = {"risk_score": [r["risk_score"] for r in results]}
+        for name in FACTOR_NAMES:
+            out[name] = [r["factor_impact"][name] for r in results]
+        return out
+
+    def column(name, dtype):
+        values = columns.get(name)
+        if values is None:
+            values = [FEATURE_DEFAULTS[name]] * n
+        return np.asarray(values, dtype=dtype)
+
+    lines = column("lines_changed", np.float64)
+    touches_core = column("touches_core", bool)
+    prev_bugs = columns.get("prev_bugs") or [0] * n
+    coverage = column("test_coverage", np.float64)
+    num_files = column("num_files_modified", np.float64)
+
+    lines_deduction = np.where(lines > 100, 25, np.where(lines > 50, 10, 0))
+    core_deduction = np.where(touches_core, 30, 0)
+    bugs_deduction = np.asarray(prev_bugs, dtype=np.float64) * 5
+    low_coverage = coverage < 80
+    coverage_deduction = np.where(low_coverage, (80 - coverage) * 0.5, 0.0)
+    files_deduction = np.where(num_files > 10, 5, 0)
+
+    # Same subtraction order as the scalar path so the floats match bit for bit
+    safety = 100.0 - lines_deduction - core_deduction - bugs_deduction - coverage_deduction - files_deduction
+
+    # The scalar clamp max(0, min(100, safety)) yields an int at either bound
+    risk = [
+        0 if no_risk else 100 if full_risk else round(100 - s, 2)
+        for s, no_risk, full_risk in zip(safety.tolist(), (safety >= 100).tolist(), (safety <= 0).tolist())
+    ]
+    return {
+        "risk_score": risk,
+        "lines_changed": (-lines_deduction).tolist(),
+        "touches_core": (-core_deduction).tolist(),
+        "prev_bugs": [-b * 5 for b in prev_bugs],
+        "test_coverage": [
+            d if low else 0 for d, low in zip((-coverage_deduction).tolist(), low_coverage.tolist())
+        ],
+        "num_files_modified": (-files_deduction).tolist(),
+    }
+
+
+def predict_risk_scores_batch(features_list):
+    """
+    Batch predict_risk_score: accepts a list of feature dicts or the columnar output of
+    extract_features_columnar, and returns the same result dicts as the scalar function, in order.
+    """
+    if isinstance(features_list, dict):
+        columns = features_list
+        names = [name for name in FEATURE_DEFAULTS if name in columns]
+        rows = [dict(zip(names, values)) for values in zip(*(columns[name] for name in names))]
+    else:
+        rows = list(features_list)
+        columns = {name: [f.get(name, default) for f in rows] for name, default in FEATURE_DEFAULTS.items()}
+    if not rows:
+        return []
+
+    scored = predict_risk_scores_columnar(columns)
+    impacts = zip(*(scored[name] for name in FACTOR_NAMES))
+    return [
+        {
+            "risk_score": risk,
+            "factors": row,
+            "factor_impact": dict(zip(FACTOR_NAMES, impact)),
+            "message": f"Heuristic risk: {risk:.2f}%",
+        }
+        for row, risk, impact in zip(rows, scored["risk_score"], impacts)
+    ]
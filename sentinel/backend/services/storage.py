@@ -0,0 +1,699 @@
+import base64
+import heapq
+import json
+import os
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from services.codec import dumps, dumps_str, loads
+from services.metrics import timed
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: writers are only serialized within one process
+    fcntl = None
+
+# How long a writer waits for another process's write transaction before giving up
+BUSY_TIMEOUT_SEC = float(os.getenv("STORE_BUSY_TIMEOUT", "30"))
+
+
+@contextmanager
+def file_lock(path, shared: bool = False):
+    """Cross-process advisory lock held on a dedicated lock file (exclusive unless shared)."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def atomic_write(path, data: bytes):
+    """
+    Replace path with data via a temp file in the same directory and a rename, so readers
+    see either the old or the new file, never a partial one.
+    """
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        mode = stat.S_IMODE(os.stat(path).st_mode) if path.exists() else 0o644
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def parse_timestamp(ts):
+    """Convert an ISO timestamp into epoch seconds (None when unparseable)."""
+    try:
+        moment = datetime.fromisoformat(ts.replace("Z", ""))
+    except Exception:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def sort_key(record: dict):
+    """Newest-first ordering key; records without a valid timestamp sort last."""
+    ts = parse_timestamp(record.get("timestamp") or "")
+    return float("-inf") if ts is None else ts
+
+
+def dedup_key(record: dict):
+    """Commit hash used as the unique key, or None for placeholder hashes."""
+    commit_hash = record.get("commit_hash")
+    if not commit_hash or commit_hash == "N/A":
+        return None
+    return commit_hash
+
+
+def encode_cursor(value) -> str:
+    """Opaque, URL-safe pagination cursor."""
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def matches_filters(record: dict, filters: dict) -> bool:
+    """
+    Python-side version of the history filters.
+    Supported keys: user, project, freeze_request, start/end (epoch seconds), min_risk/max_risk.
+    """
+    if filters.get("user") is not None and record.get("user") != filters["user"]:
+        return False
+    if filters.get("project") is not None and record.get("project") != filters["project"]:
+        return False
+    if filters.get("freeze_request") is not None and bool(record.get("freeze_request")) != filters["freeze_request"]:
+        return False
+    if filters.get("start") is not None or filters.get("end") is not None:
+        ts = parse_timestamp(record.get("timestamp") or "")
+        if ts is None:
+            return False
+        if filters.get("start") is not None and ts < filters["start"]:
+            return False
+        if filters.get("end") is not None and ts > filters["end"]:
+            return False
+    if filters.get("min_risk") is not None or filters.get("max_risk") is not None:
+        risk = record.get("risk_score")
+        if risk is None:
+            return False
+        if filters.get("min_risk") is not None and risk < filters["min_risk"]:
+            return False
+        if filters.get("max_risk") is not None and risk > filters["max_risk"]:
+            return False
+    return True
+
+
+class CommitStore:
+    """Interface shared by every processed-commit storage backend."""
+
+    def all(self):
+        """Return every record, newest first."""
+        raise NotImplementedError
+
+    def query(self, filters: dict = None, cursor: str = None, limit: int = None):
+        """
+        Filtered history, newest first. Returns (records, next_cursor).
+        This generic version filters in Python and pages by offset.
+        """
+        matches = [r for r in self.all() if matches_filters(r, filters or {})]
+        matches.sort(key=sort_key, reverse=True)
+        offset = decode_cursor(cursor) if cursor else 0
+        if not isinstance(offset, int):
+            raise ValueError("Invalid cursor")
+        if limit is None:
+            return matches[offset:], None
+        end = offset + limit
+        return matches[offset:end], encode_cursor(end) if end < len(matches) else None
+
+    def iter_batches(self, filters: dict = None, batch_size: int = 500):
+        """Stream filtered history in pages of batch_size records, newest first."""
+        cursor = None
+        while True:
+            records, cursor = self.query(filters, cursor=cursor, limit=batch_size)
+            if records:
+                yield records
+            if cursor is None:
+                return
+
+    def append(self, record: dict) -> bool:
+        """Insert one record; returns False if its commit hash is already stored."""
+        return len(self.extend([record])) == 1
+
+    def extend(self, records: list) -> list:
+        """Insert many records, skipping known commit hashes; returns the records actually inserted."""
+        raise NotImplementedError
+
+    def replace_all(self, records: list):
+        """Overwrite the whole store with the given records."""
+        raise NotImplementedError
+
+    def iter_stale(self, score_version: str, batch_size: int = 500):
+        """Yield batches of (key, record) for records not scored by score_version."""
+        raise NotImplementedError
+
+    def update_many(self, pairs: list):
+        """Write back (key, record) pairs obtained from iter_stale."""
+        raise NotImplementedError
+
+    def contains(self, commit_hash: str) -> bool:
+        raise NotImplementedError
+
+    def get(self, commit_hash: str):
+        """The stored record for a commit hash, or None."""
+        raise NotImplementedError
+
+    def known_hashes(self, hashes) -> set:
+        """Subset of the given commit hashes that are already stored."""
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def version(self) -> int:
+        """Data version: increases on every write, so it can key caches and ETags."""
+        raise NotImplementedError
+
+    def last_modified(self):
+        """Epoch seconds of the last write, or None if unknown."""
+        raise NotImplementedError
+
+    def changes_since(self, version: int):
+        """
+        (current version, records added or rewritten after `version`, newest first).
+        The records are None when the store cannot compute the delta and a full reload is needed.
+        """
+        return self.version(), None
+
+    def appended_since(self, version: int):
+        """
+        (current version, records inserted after `version`), or records None when anything
+        other than inserts happened since (rewrites, replace_all) or the store cannot tell.
+        """
+        return self.version(), None
+
+    def versioned_all(self):
+        """(version, every record) read as one consistent snapshot."""
+        return self.version(), self.all()
+
+    def written_version(self):
+        """Data version committed by the calling thread's latest write, or None."""
+        return getattr(self._writes, "version", None)
+
+    def save_job(self, job: dict):
+        """Persist a job's status so every worker process can report it (no-op by default)."""
+
+    def load_job(self, job_id: str):
+        """A job saved by save_job, possibly by another process, or None."""
+        return None
+
+
+class JsonFileStore(CommitStore):
+    """
+    Legacy backend: the whole dataset lives in one JSON array on disk.
+    Writers take an exclusive lock file and replace the array atomically; readers take no
+    lock and always see a complete file. The data version is a counter in a sidecar file.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._writes = threading.local()
+        self._lock_path = self.path.with_name(self.path.name + ".lock")
+        self._version_path = self.path.with_name(self.path.name + ".version")
+
+    def _load(self):
+        if not self.path.exists():
+            return []
+        with open(self.path, "rb") as f:
+            return loads(f.read())
+
+    @contextmanager
+    def _writer(self):
+        """Single writer across threads and processes; the read-modify-write happens inside."""
+        with self._lock, file_lock(self._lock_path):
+            yield
+
+    def _dump(self, data):
+        # Compact: indentation roughly doubled the file and the time to parse it
+        atomic_write(self.path, dumps(data))
+        # Data first, then the version: a reader may pair new data with an old version, never the reverse
+        version = self.version() + 1
+        atomic_write(self._version_path, str(version).encode())
+        self._writes.version = version
+
+    def all(self):
+        return self._load()
+
+    @timed("store_extend")
+    def extend(self, records):
+        with self._writer():
+            data = self._load()
+            seen = {dedup_key(r) for r in data}
+            seen.discard(None)
+            fresh = []
+            for record in records:
+                key = dedup_key(record)
+                if key is not None and key in seen:
+                    continue
+                seen.add(key)
+                fresh.append(record)
+            if fresh:
+                # The file is kept newest first: merge the sorted new records in, no full re-sort
+                merged = heapq.merge(data, sorted(fresh, key=sort_key, reverse=True), key=sort_key, reverse=True)
+                self._dump(list(merged))
+            return fresh
+
+    @timed("store_replace_all")
+    def replace_all(self, records):
+        with self._writer():
+            self._dump(list(records))
+
+    @staticmethod
+    def _identity(record: dict):
+        return dedup_key(record), record.get("timestamp"), record.get("id")
+
+    def iter_stale(self, score_version, batch_size=500):
+        # Keys are list positions plus an identity check, since appends can shift positions
+        stale = [
+            ((i, self._identity(r)), r)
+            for i, r in enumerate(self.all())
+            if r.get("score_version") != score_version
+        ]
+        for i in range(0, len(stale), batch_size):
+            yield stale[i:i + batch_size]
+
+    @timed("store_update_many")
+    def update_many(self, pairs):
+        with self._writer():
+            data = self._load()
+            for (i, identity), record in pairs:
+                if i >= len(data) or self._identity(data[i]) != identity:
+                    i = next((j for j, r in enumerate(data) if self._identity(r) == identity), None)
+                    if i is None:
+                        continue
+                data[i] = record
+            self._dump(data)
+
+    def iter_batches(self, filters=None, batch_size=500):
+        # The file has to be parsed whole anyway; filter it once instead of once per page
+        records, _ = self.query(filters)
+        for i in range(0, len(records), batch_size):
+            yield records[i:i + batch_size]
+
+    def contains(self, commit_hash):
+        return any(r.get("commit_hash") == commit_hash for r in self.all())
+
+    def get(self, commit_hash):
+        return next((r for r in self.all() if r.get("commit_hash") == commit_hash), None)
+
+    def known_hashes(self, hashes):
+        wanted = set(hashes)
+        return {r.get("commit_hash") for r in self.all()} & wanted
+
+    def count(self):
+        return len(self.all())
+
+    def version(self):
+        try:
+            return int(self._version_path.read_bytes())
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def last_modified(self):
+        for path in (self._version_path, self.path):
+            try:
+                return path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+        return None
+
+
+class SQLiteCommitStore(CommitStore):
+    """
+    Default backend: one row per record in SQLite.
+    Indexed columns mirror the record fields we filter on; the full record is kept as JSON.
+    WAL mode gives one writer at a time (across processes too, waiting up to BUSY_TIMEOUT_SEC)
+    and readers that never block: each thread reads through its own query-only connection.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS commits (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            commit_hash TEXT,
+            user TEXT,
+            project TEXT,
+            ts REAL,
+            risk_score REAL,
+            freeze_request INTEGER,
+            score_version TEXT,
+            version INTEGER NOT NULL DEFAULT 0,
+            created_version INTEGER NOT NULL DEFAULT 0,
+            body TEXT NOT NULL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_commits_hash ON commits(commit_hash);
+        CREATE INDEX IF NOT EXISTS idx_commits_user ON commits(user, ts);
+        CREATE INDEX IF NOT EXISTS idx_commits_project ON commits(project, ts);
+        CREATE INDEX IF NOT EXISTS idx_commits_ts ON commits(ts);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            body TEXT NOT NULL,
+            updated_at REAL
+        );
+    """
+
+    # Rows written in a transaction carry the data version that transaction commits as
+    NEXT_VERSION = "(SELECT CAST(value AS INTEGER) + 1 FROM meta WHERE key = 'data_version')"
+
+    INSERT = (
+        "INSERT OR IGNORE INTO commits "
+        "(commit_hash, user, project, ts, risk_score, freeze_request, score_version, body, version, created_version) "
+        f"VALUES (?, ?, ?, ?, ?, ?, ?, ?, {NEXT_VERSION}, {NEXT_VERSION})"
+    )
+
+    def __init__(self, path: Path, legacy_path: Path = None):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._writes = threading.local()
+        self._readers = threading.local()
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=BUSY_TIMEOUT_SEC, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._migrate()
+        if legacy_path is not None:
+            self.import_json(legacy_path)
+
+    @staticmethod
+    def _row(record: dict):
+        return (
+            dedup_key(record),
+            record.get("user"),
+            record.get("project"),
+            parse_timestamp(record.get("timestamp") or ""),
+            record.get("risk_score"),
+            int(bool(record.get("freeze_request"))),
+            record.get("score_version"),
+            dumps_str(record),
+        )
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction; callers hold self._lock."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _bump_version(self):
+        self._conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'data_version'")
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('modified_at', ?)", (time.time(),))
+        self._writes.version = int(self._meta(self._conn, "data_version"))
+
+    @staticmethod
+    def _meta(conn, key):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _reader(self):
+        """This thread's read connection; reads never wait for writers or for each other."""
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT_SEC, isolation_level=None)
+            conn.execute("PRAGMA query_only=1")
+            self._readers.conn = conn
+        return conn
+
+    @contextmanager
+    def _snapshot(self):
+        """Read transaction: every query inside sees the same committed version."""
+        conn = self._reader()
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+    def version(self):
+        return int(self._meta(self._reader(), "data_version"))
+
+    def last_modified(self):
+        value = self._meta(self._reader(), "modified_at")
+        return float(value) if value is not None else None
+
+    def changes_since(self, version):
+        with self._snapshot() as conn:
+            current = int(self._meta(conn, "data_version"))
+            if not int(self._meta(conn, "reset_version") or 0) <= version <= current:
+                return current, None
+            rows = conn.execute(
+                "SELECT body FROM commits WHERE version > ? ORDER BY ts DESC, seq DESC", (version,)
+            ).fetchall()
+        return current, [loads(body) for (body,) in rows]
+
+    def appended_since(self, version):
+        with self._snapshot() as conn:
+            current = int(self._meta(conn, "data_version"))
+            if not int(self._meta(conn, "reset_version") or 0) <= version <= current:
+                return current, None
+            rewritten = conn.execute(
+                "SELECT 1 FROM commits WHERE version > ? AND created_version <= ? LIMIT 1", (version, version)
+            ).fetchone()
+            if rewritten:
+                return current, None
+            rows = conn.execute(
+                "SELECT body FROM commits WHERE created_version > ? ORDER BY seq", (version,)
+            ).fetchall()
+        return current, [loads(body) for (body,) in rows]
+
+    def versioned_all(self):
+        with self._snapshot() as conn:
+            current = int(self._meta(conn, "data_version"))
+            rows = conn.execute("SELECT body FROM commits ORDER BY ts DESC, seq DESC").fetchall()
+        return current, [loads(body) for (body,) in rows]
+
+    def _migrate(self):
+        """Bring databases created by older versions up to the current schema."""
+        with self._lock, self._transaction():
+            # Inside a write transaction so two processes starting at once don't both migrate
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(commits)")}
+            if "score_version" not in columns:
+                self._conn.execute("ALTER TABLE commits ADD COLUMN score_version TEXT")
+            self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('data_version', '0')")
+            if "version" not in columns:
+                self._conn.execute("ALTER TABLE commits ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+                # Existing rows count as written by one new version, so deltas from 0 still include them
+                self._conn.execute(f"UPDATE commits SET version = {self.NEXT_VERSION}")
+                self._bump_version()
+            if "created_version" not in columns:
+                self._conn.execute("ALTER TABLE commits ADD COLUMN created_version INTEGER NOT NULL DEFAULT 0")
+                self._conn.execute("UPDATE commits SET created_version = version")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_commits_score_version ON commits(score_version)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_commits_version ON commits(version)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_commits_created ON commits(created_version)")
+
+    def import_json(self, legacy_path: Path):
+        """One-shot import of a legacy prototype.json; later calls are no-ops."""
+        legacy_path = Path(legacy_path)
+        if not legacy_path.exists():
+            return 0
+        with self._lock, self._transaction():
+            # Checked inside the write transaction: only one worker process imports
+            if self._meta(self._conn, "imported_from") is not None:
+                return 0
+            with open(legacy_path, "rb") as f:
+                legacy = loads(f.read())
+            # prototype.json is stored newest first; insert oldest first so seq follows age.
+            before = self._conn.total_changes
+            self._conn.executemany(self.INSERT, [self._row(r) for r in reversed(legacy)])
+            imported = self._conn.total_changes - before
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('imported_from', ?)",
+                (str(legacy_path),),
+            )
+            self._bump_version()
+        return imported
+
+    def all(self):
+        rows = self._reader().execute("SELECT body FROM commits ORDER BY ts DESC, seq DESC").fetchall()
+        return [loads(body) for (body,) in rows]
+
+    @staticmethod
+    def _where(filters: dict):
+        clauses, params = [], []
+        for key, clause in (
+            ("user", "user = ?"),
+            ("project", "project = ?"),
+            ("freeze_request", "freeze_request = ?"),
+            ("start", "ts >= ?"),
+            ("end", "ts <= ?"),
+            ("min_risk", "risk_score >= ?"),
+            ("max_risk", "risk_score <= ?"),
+        ):
+            value = filters.get(key)
+            if value is not None:
+                clauses.append(clause)
+                params.append(int(value) if key == "freeze_request" else value)
+        return clauses, params
+
+    def query(self, filters=None, cursor=None, limit=None):
+        """Keyset pagination on (ts, seq); the cursor is the last row handed out."""
+        clauses, params = self._where(filters or {})
+        if cursor:
+            position = decode_cursor(cursor)
+            if not isinstance(position, list) or len(position) != 2:
+                raise ValueError("Invalid cursor")
+            ts, seq = position
+            if ts is None:
+                clauses.append("(ts IS NULL AND seq < ?)")
+                params.append(seq)
+            else:
+                clauses.append("(ts < ? OR (ts = ? AND seq < ?) OR ts IS NULL)")
+                params.extend([ts, ts, seq])
+
+        sql = "SELECT seq, ts, body FROM commits"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY ts DESC, seq DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        rows = self._reader().execute(sql, params).fetchall()
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1][1], rows[-1][0]])
+        return [loads(body) for (_, _, body) in rows], next_cursor
+
+    @timed("store_extend")
+    def extend(self, records):
+        records = list(records)
+        if not records:
+            return []
+        inserted = []
+        with self._lock, self._transaction():
+            for record in records:
+                if self._conn.execute(self.INSERT, self._row(record)).rowcount:
+                    inserted.append(record)
+            if inserted:
+                self._bump_version()
+        return inserted
+
+    @timed("store_replace_all")
+    def replace_all(self, records):
+        rows = [self._row(r) for r in records]
+        with self._lock, self._transaction():
+            self._conn.execute("DELETE FROM commits")
+            self._conn.executemany(self.INSERT, rows)
+            # Deletions are not tracked per row: deltas from before this point need a full reload
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO meta (key, value) VALUES ('reset_version', {self.NEXT_VERSION})"
+            )
+            self._bump_version()
+
+    def iter_stale(self, score_version, batch_size=500):
+        last_seq = 0
+        while True:
+            rows = self._reader().execute(
+                "SELECT seq, body FROM commits "
+                "WHERE (score_version IS NULL OR score_version != ?) AND seq > ? "
+                "ORDER BY seq LIMIT ?",
+                (score_version, last_seq, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            last_seq = rows[-1][0]
+            yield [(seq, loads(body)) for seq, body in rows]
+
+    @timed("store_update_many")
+    def update_many(self, pairs):
+        """Rewrite only the given rows (keyed by seq); untouched rows are left as they are."""
+        rows = [self._row(record)[1:] + (seq,) for seq, record in pairs]
+        if not rows:
+            return
+        with self._lock, self._transaction():
+            self._conn.executemany(
+                "UPDATE commits SET user = ?, project = ?, ts = ?, risk_score = ?, "
+                f"freeze_request = ?, score_version = ?, body = ?, version = {self.NEXT_VERSION} WHERE seq = ?",
+                rows,
+            )
+            self._bump_version()
+
+    def contains(self, commit_hash):
+        row = self._reader().execute("SELECT 1 FROM commits WHERE commit_hash = ?", (commit_hash,)).fetchone()
+        return row is not None
+
+    def get(self, commit_hash):
+        row = self._reader().execute("SELECT body FROM commits WHERE commit_hash = ?", (commit_hash,)).fetchone()
+        return loads(row[0]) if row else None
+
+    def known_hashes(self, hashes):
+        hashes = list({h for h in hashes if h})
+        known = set()
+        conn = self._reader()
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(hashes), 500):
+            batch = hashes[i:i + 500]
+            rows = conn.execute(
+                f"SELECT commit_hash FROM commits WHERE commit_hash IN ({','.join('?' * len(batch))})",
+                batch,
+            ).fetchall()
+            known.update(h for (h,) in rows)
+        return known
+
+    def count(self):
+        (n,) = self._reader().execute("SELECT COUNT(*) FROM commits").fetchone()
+        return n
+
+    @timed("store_save_job")
+    def save_job(self, job):
+        with self._lock, self._transaction():
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, body, updated_at) VALUES (?, ?, ?)",
+                (job["id"], dumps_str(job), time.time()),
+            )
+
+    def load_job(self, job_id):
+        row = self._reader().execute("SELECT body FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return loads(row[0]) if row else None
+
+
+def open_store(backend: str, path: Path, legacy_path: Path = None) -> CommitStore:
+    """Build the storage backend selected by STORE_BACKEND ("sqlite" or "json")."""
+    if backend == "json":
+        return JsonFileStore(legacy_path or path)
+    if backend == "sqlite":
+        os.makedirs(Path(path).parent, exist_ok=True)
+        return SQLiteCommitStore(path, legacy_path=legacy_path)
+    raise ValueError(f"Unknown store backend: {backend}")
@@ -0,0 +1,109 @@
+"""The compiled RuleSet must give exactly the results of the original rule-by-rule checker."""
+import random
+import re
+from datetime import datetime
+
+from services.compliance_checker import (
+    APPROVED_LABELS,
+    AUTHORIZED_AUTHORS,
+    PREFIXES,
+    PROTECTED_DIRS,
+    TEMP_FILE_EXTENSIONS,
+    RuleSet,
+    _rule_intent,
+    check_compliance,
+)
+
+CASES = 20000
+
+
+def reference_check_compliance(commit_message, changed_files, pr_title="", pr_labels=(), author_email=None,
+                               timestamp=None):
+    """check_compliance as it was before the rules were compiled."""
+    labels_lower = [label.lower() for label in (pr_labels or [])]
+    if any(label in APPROVED_LABELS for label in labels_lower):
+        return {"is_compliant": True, "category": "label_override", "confidence": 1.0,
+                "message": "Allowed via label override"}
+
+    intent, confidence = _rule_intent((pr_title + " " + commit_message).strip())
+    warnings = []
+
+    if not any(commit_message.lower().startswith(p) for p in PREFIXES):
+        warnings.append("Commit prefix missing or invalid")
+        confidence *= 0.7
+    if any(f.startswith(tuple(PROTECTED_DIRS)) for f in (changed_files or [])):
+        if not any(label in labels_lower for label in APPROVED_LABELS):
+            warnings.append("Protected directory modified without approval")
+            confidence *= 0.6
+    if len(commit_message.strip()) < 10:
+        warnings.append("Commit message too short")
+        confidence *= 0.5
+    if any(k in commit_message.lower() for k in ["temporary", "quick fix", "test only"]):
+        warnings.append("Contains risky keyword")
+        confidence *= 0.7
+    if len(re.findall(r"\b(fix|feat|test|docs):", commit_message.lower())) > 1:
+        warnings.append("Multiple prefixes detected")
+        confidence *= 0.85
+    if any(f.endswith(tuple(TEMP_FILE_EXTENSIONS)) for f in (changed_files or [])):
+        warnings.append("Contains temporary/backup files")
+        confidence *= 0.6
+    if author_email and author_email not in AUTHORIZED_AUTHORS:
+        warnings.append(f"Unauthorized author: {author_email}")
+        confidence *= 0.8
+    if not re.match(r"^\w+(\(\w+\))?: .+", commit_message):
+        warnings.append("Message format incorrect")
+        confidence *= 0.9
+    if len(commit_message.splitlines()) > 100:
+        warnings.append("Commit message too long")
+        confidence *= 0.85
+    if timestamp:
+        try:
+            if datetime.fromisoformat(timestamp.replace("Z", "")) > datetime.now():
+                warnings.append("Commit timestamp is in the future")
+                confidence *= 0.9
+        except Exception:
+            warnings.append("Invalid timestamp")
+            confidence *= 0.9
+
+    return {
+        "is_compliant": not warnings,
+        "category": intent,
+        "confidence": round(confidence, 2),
+        "message": " | ".join(warnings) if warnings else f"{intent} allowed",
+    }
+
+
+FRAGMENTS = [
+    "fix: ", "feat: ", "docs: ", "test: ", "Fix: ", "feat(core): ", "chore: ", "refactor ", "fix:", "test:",
+    "bug", "feature", "readme", "perf", "security", "temporary", "quick fix", "test only", "Quick Fix",
+    "update", "the login page", " ", "\n", "x", "_",
+]
+FILES = ["core/a.py", "db/m.sql", "auth/x.py", "src/core/b.py", "a.tmp", "b.bak", "c~", "README.md", "coreutils.c"]
+LABELS = ["@approved", "@Approved", "HOTFIX", "allow-during-freeze", "security", "needs-review"]
+AUTHORS = AUTHORIZED_AUTHORS + ["mallory@example.com", "", None]
+TIMESTAMPS = [
+    None, "", "2025-01-01T10:00:00Z", "2999-01-01T00:00:00Z", "2025-01-01", "not a date",
+    "2025-01-01T10:00:00+00:00", "2025-13-01T00:00:00Z",
+]
+
+
+def random_case(rng: random.Random) -> dict:
+    message = "".join(rng.choice(FRAGMENTS) for _ in range(rng.choice([0, 1, 2, 3, 6])))
+    if rng.random() < 0.01:
+        message += "\nline" * rng.choice([99, 100, 101])
+    return {
+        "commit_message": message,
+        "changed_files": rng.choice([None, []] + [[rng.choice(FILES) for _ in range(3)]] * 4),
+        "pr_title": rng.choice(["", "", "Fix the bug", "docs only"]),
+        "pr_labels": rng.choice([None, [], [rng.choice(LABELS)], [rng.choice(LABELS), rng.choice(LABELS)]]),
+        "author_email": rng.choice(AUTHORS),
+        "timestamp": rng.choice(TIMESTAMPS),
+    }
+
+
+def test_compiled_rules_match_reference():
+    rng = random.Random(11)
+    rules = RuleSet()
+    for _ in range(CASES):
+        case = random_case(rng)
+        assert check_compliance(**case, rules=rules) == reference_check_compliance(**case), case
@@ -0,0 +1,48 @@
+"""Rescoring under unchanged rules must give back the stored record."""
+import json
+
+from services.ingest import SCORING_VERSION, rescore_record, score_chunk, score_payload, score_raw_commit
+
+RAW_COMMITS = [
+    # No feature fields: scored with the raw defaults (40 lines, 1 prior bug, 90% coverage)
+    {"commit_hash": "x1", "user": "huy", "user_email": "huy@gmail.com", "branch": "main",
+     "commit_message": "fix: handle the parser"},
+    {"commit_hash": "x2", "user": "son", "user_email": "son@gmail.com", "commit_message": "feat(core): login",
+     "file_modified": ["core/auth.py"], "pr_labels": ["@approved"], "timestamp": "2025-11-01T09:00:00Z"},
+    {"commit_hash": "x3", "user_email": None, "commit_message": "wip", "lines_changed": 300, "prev_bugs": 4,
+     "test_coverage": 40},
+]
+
+
+def canonical(value) -> str:
+    return json.dumps(value, sort_keys=True)
+
+
+def test_rescoring_ingested_raw_commits_changes_nothing():
+    for stored in score_chunk(RAW_COMMITS) + [score_raw_commit(c) for c in RAW_COMMITS]:
+        assert canonical(rescore_record(stored)) == canonical(stored)
+
+
+def test_rescoring_analyzed_payload_changes_nothing():
+    stored = score_payload({
+        "id": 7, "user": "huy", "user_email": "huy@gmail.com", "project": "sentinel",
+        "commit_message": "fix: quick fix", "commit_hash": "y1", "files": ["db/x.sql"], "lines_changed": 120,
+        "file_modified": ["db/x.sql"], "pr_labels": ["security"],
+    })
+    assert canonical(rescore_record(stored)) == canonical(stored)
+
+
+def test_unversioned_records_keep_their_origin():
+    analyzed = {
+        "id": 201, "user": "anonymous", "user_email": None, "project": "Unknown", "commit_message": "",
+        "commit_hash": "N/A", "repo_url": "", "risk_score": 0, "confident_score": 19, "freeze_request": True,
+        "feedback": "", "factor_impact": {}, "file_added": [], "file_removed": [], "file_modified": [],
+        "timestamp": None,
+    }
+    assert rescore_record(analyzed)["risk_score"] == 0
+
+    raw = {**RAW_COMMITS[0], "risk_score": 5.0, "factor_impact": {}}
+    rescored = rescore_record(raw)
+    assert rescored["risk_score"] == 5.0
+    assert rescored["branch"] == "main" and "project" not in rescored
+    assert rescored["score_version"] == SCORING_VERSION
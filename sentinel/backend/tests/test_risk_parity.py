@@ -0,0 +1,110 @@
+"""The columnar/vectorized risk path must give exactly the scalar path's records."""
+import json
+import random
+
+import pytest
+
+from services import risk_predictor
+from services.ingest import score_chunk, score_raw_commit
+from services.risk_predictor import (
+    FACTOR_NAMES,
+    extract_features,
+    extract_features_columnar,
+    predict_risk_score,
+    predict_risk_scores_batch,
+    predict_risk_scores_columnar,
+)
+
+CASES = 5000
+
+FILES = ["core/main.py", "db/schema.sql", "auth/login.py", "src/app.py", "README.md", "core", "notes.tmp"]
+
+
+def random_payload(rng: random.Random) -> dict:
+    """Feature payload around every threshold of predict_risk_score; keys are sometimes missing."""
+    payload = {}
+    if rng.random() < 0.9:
+        payload["lines_changed"] = rng.choice([rng.randint(0, 300), 50, 51, 100, 101, rng.uniform(0, 200)])
+    if rng.random() < 0.9:
+        payload["prev_bugs"] = rng.choice([rng.randint(0, 30), rng.uniform(0, 5)])
+    if rng.random() < 0.9:
+        payload["test_coverage"] = rng.choice([rng.randint(0, 100), 79, 80, rng.uniform(0, 100)])
+    if rng.random() < 0.9:
+        payload["files"] = [rng.choice(FILES) for _ in range(rng.choice([0, 1, 3, 10, 11, 15]))]
+    return payload
+
+
+def random_commit(rng: random.Random) -> dict:
+    """Raw commit (raw_commits.json schema)."""
+    commit = {
+        "commit_hash": f"{rng.getrandbits(40):010x}",
+        "commit_message": rng.choice(["fix: null check", "feat(core): login", "wip", "docs: readme quick fix"]),
+        "user_email": rng.choice(["huy@gmail.com", "someone@example.com", None]),
+        "timestamp": rng.choice(["2025-01-01T10:00:00Z", "2999-01-01T00:00:00Z", None]),
+    }
+    payload = random_payload(rng)
+    if "files" in payload:
+        commit["file_modified"] = payload.pop("files")
+    if rng.random() < 0.2:
+        commit["pr_labels"] = rng.choice([["@approved"], ["security"], []])
+    return {**commit, **payload}
+
+
+def canonical(value) -> str:
+    """JSON text, so 10 and 10.0 compare as different."""
+    return json.dumps(value, sort_keys=True)
+
+
+@pytest.fixture(params=["numpy", "fallback"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        if risk_predictor.np is None:
+            pytest.skip("numpy not installed")
+    else:
+        monkeypatch.setattr(risk_predictor, "np", None)
+    return request.param
+
+
+def test_extract_features_columnar_matches_scalar():
+    rng = random.Random(7)
+    payloads = [random_payload(rng) for _ in range(CASES)]
+    columns = extract_features_columnar(payloads)
+    for i, payload in enumerate(payloads):
+        assert canonical({name: columns[name][i] for name in columns}) == canonical(extract_features(payload))
+
+
+def test_predict_risk_scores_columnar_matches_scalar(backend):
+    rng = random.Random(8)
+    features = [extract_features(random_payload(rng)) for _ in range(CASES)]
+    assert predict_risk_scores_columnar(extract_features_columnar([]))["risk_score"] == []
+
+    columns = predict_risk_scores_columnar({name: [f[name] for f in features] for name in features[0]})
+    for i, f in enumerate(features):
+        expected = predict_risk_score(f)
+        assert canonical(columns["risk_score"][i]) == canonical(expected["risk_score"])
+        impact = {name: columns[name][i] for name in FACTOR_NAMES}
+        assert canonical(impact) == canonical(expected["factor_impact"])
+
+
+def test_predict_risk_scores_batch_matches_scalar(backend):
+    rng = random.Random(10)
+    payloads = [random_payload(rng) for _ in range(CASES)]
+    features = [extract_features(p) for p in payloads]
+    # Partial feature dicts take the scalar function's defaults
+    partial = [{k: v for k, v in f.items() if rng.random() < 0.7} for f in features]
+    assert predict_risk_scores_batch([]) == []
+
+    expected = [canonical(predict_risk_score(f)) for f in features]
+    assert [canonical(r) for r in predict_risk_scores_batch(features)] == expected
+    assert [canonical(r) for r in predict_risk_scores_batch(extract_features_columnar(payloads))] == expected
+    assert [canonical(r) for r in predict_risk_scores_batch(partial)] == [
+        canonical(predict_risk_score(f)) for f in partial
+    ]
+
+
+def test_score_chunk_matches_score_raw_commit(backend):
+    rng = random.Random(9)
+    commits = [random_commit(rng) for _ in range(CASES)]
+    for start in range(0, CASES, 500):
+        chunk = commits[start:start + 500]
+        assert [canonical(r) for r in score_chunk(chunk)] == [canonical(score_raw_commit(c)) for c in chunk]
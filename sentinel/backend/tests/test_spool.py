@@ -0,0 +1,136 @@
+"""Byte offsets of NDJSONDecoder and the checkpointed Spool."""
+import os
+
+import pytest
+
+from services.codec import dumps
+from services.ingest import NDJSONDecoder, Spool, ingest_stream, iter_ndjson, score_chunk
+from services.storage import JsonFileStore
+
+
+def lines(*objects) -> bytes:
+    return b"".join(dumps(o) + b"\n" for o in objects)
+
+
+def test_partial_last_line_waits_for_its_newline():
+    decoder = NDJSONDecoder()
+    first = lines({"n": 1})
+    assert decoder.feed(first + b'{"n": ') == [({"n": 1}, len(first))]
+    assert decoder.offset == len(first)
+
+    assert decoder.feed(b"2}\n") == [({"n": 2}, len(first) + 9)]
+    assert decoder.offset == len(first) + 9
+    assert decoder.feed(b'{"n": 3}') == []
+    assert decoder.finish() == [({"n": 3}, len(first) + 18)]
+
+
+def test_lines_split_across_feeds_keep_their_offsets():
+    data = lines({"a": 1}, {"b": "x" * 50}, {"c": 3})
+    decoder = NDJSONDecoder(offset=100)
+    items = []
+    for i in range(0, len(data), 7):
+        items.extend(decoder.feed(data[i:i + 7]))
+    ends = [100 + data.index(b"\n", data.index(key)) + 1 for key in (b'"a"', b'"b"', b'"c"')]
+    assert items == [({"a": 1}, ends[0]), ({"b": "x" * 50}, ends[1]), ({"c": 3}, ends[2])]
+    assert decoder.offset == 100 + len(data)
+
+
+def test_invalid_and_blank_lines_are_skipped_and_reported():
+    decoder = NDJSONDecoder()
+    data = b'{"n": 1}\n\nnot json\n[1, 2]\n{"n": 2}\n'
+    assert [value for value, _ in decoder.feed(data)] == [{"n": 1}, {"n": 2}]
+    assert decoder.invalid == 2
+    assert [(e["line"], e["offset"]) for e in decoder.errors] == [(3, 10), (4, 19)]
+    assert decoder.errors[1]["error"] == "expected a JSON object"
+    assert decoder.offset == len(data)
+
+
+@pytest.mark.parametrize("chunk", [4096, 8])
+def test_long_line_is_dropped_in_lenient_mode(chunk):
+    data = lines({"n": 1}, {"pad": "x" * 100}, {"n": 2})
+    decoder = NDJSONDecoder(max_line=40)
+    items = []
+    for i in range(0, len(data), chunk):
+        items.extend(decoder.feed(data[i:i + chunk]))
+    assert [value for value, _ in items] == [{"n": 1}, {"n": 2}]
+    assert items[-1][1] == len(data)
+    assert decoder.invalid == 1 and "longer than 40 bytes" in decoder.errors[0]["error"]
+    assert decoder.offset == len(data)
+
+
+@pytest.mark.parametrize("chunk", [4096, 8])
+def test_long_line_fails_in_strict_mode_after_the_lines_before_it(chunk):
+    data = lines({"n": 1}, {"pad": "x" * 100}, {"n": 2})
+    decoder = NDJSONDecoder(max_line=40, strict=True)
+    items = []
+    with pytest.raises(ValueError, match="longer than 40 bytes"):
+        for i in range(0, len(data), chunk):
+            items.extend(decoder.feed(data[i:i + chunk]))
+        decoder.finish()
+    assert [value for value, _ in items] == [{"n": 1}]
+    assert decoder.offset == len(lines({"n": 1}))
+
+
+def test_spool_offset_follows_commits(tmp_path):
+    spool = Spool(tmp_path / "raw.ndjson")
+    assert spool.offset() == 0
+    spool.append([{"commit_hash": "a"}, {"commit_hash": "b"}])
+    end_of_a = len(lines({"commit_hash": "a"}))
+    spool.commit(end_of_a)
+    assert spool.offset() == end_of_a
+    assert [c for c, _ in iter_ndjson(spool.path, NDJSONDecoder(spool.offset()))] == [{"commit_hash": "b"}]
+    assert spool.pending_bytes() == os.path.getsize(spool.path) - end_of_a
+
+
+def test_spool_starts_over_when_replaced_or_truncated(tmp_path):
+    spool = Spool(tmp_path / "raw.ndjson")
+    spool.append([{"commit_hash": "a"}, {"commit_hash": "b"}])
+    spool.commit(os.path.getsize(spool.path))
+
+    # Truncated below the checkpoint
+    os.truncate(spool.path, 5)
+    assert spool.offset() == 0
+
+    # Same size, new file (inode)
+    spool.append([{"commit_hash": "c"}])
+    spool.commit(os.path.getsize(spool.path))
+    replacement = tmp_path / "new.ndjson"
+    replacement.write_bytes(spool.path.read_bytes())
+    os.replace(replacement, spool.path)
+    assert spool.offset() == 0
+
+
+def test_compact_empties_a_fully_ingested_spool(tmp_path):
+    spool = Spool(tmp_path / "raw.ndjson")
+    spool.append([{"commit_hash": "a"}])
+    spool.compact()
+    assert os.path.getsize(spool.path) > 0
+    spool.commit(os.path.getsize(spool.path))
+    spool.compact()
+    assert os.path.getsize(spool.path) == 0 and spool.offset() == 0
+
+
+def test_interrupted_ingest_resumes_at_the_checkpoint(tmp_path):
+    spool = Spool(tmp_path / "raw.ndjson")
+    commits = [{"commit_hash": f"h{i}", "commit_message": "fix: thing", "user": "u"} for i in range(10)]
+    spool.append(commits)
+    store = JsonFileStore(tmp_path / "store.json")
+    scored = []
+
+    def failing_score(chunk):
+        if scored:
+            raise RuntimeError("worker died")
+        scored.append(chunk)
+        return score_chunk(chunk)
+
+    decoder = NDJSONDecoder(spool.offset())
+    with pytest.raises(RuntimeError):
+        ingest_stream(iter_ndjson(spool.path, decoder), store, chunk_size=4, score=failing_score,
+                      checkpoint=spool.commit)
+    assert [r["commit_hash"] for r in store.all()] == ["h0", "h1", "h2", "h3"]
+    assert spool.offset() == len(lines(*commits[:4]))
+
+    decoder = NDJSONDecoder(spool.offset())
+    assert ingest_stream(iter_ndjson(spool.path, decoder), store, chunk_size=4, checkpoint=spool.commit) == 6
+    assert sorted(r["commit_hash"] for r in store.all()) == [f"h{i}" for i in range(10)]
+    assert spool.offset() == os.path.getsize(spool.path)
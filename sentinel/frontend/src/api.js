@@ -5,11 +5,13 @@ const API_BASE_URL = "http://localhost:8000";
 
 /**
  * Fetch commit history from the backend
+ * @param params optional filters (user, project, freeze_request, start, end,
+ *               min_risk, max_risk), `fields`, and `limit`/`cursor` for paging
  * @returns {Promise<*|*[]>}
  */
-export async function fetchHistory() {
+export async function fetchHistory(params = {}) {
     try {
-        const response = await axios.get(`${API_BASE_URL}/api/history`);
+        const response = await axios.get(`${API_BASE_URL}/api/history`, { params });
         return response.data;
     } catch (error) {
         console.error("❌ Failed to fetch history:", error);
@@ -46,11 +48,75 @@ export async function fetchInsights() {
     }
 }
 
-// Fetch mock GitHub commits
+/**
+ * Fetch running totals (global, per project, per user, per day)
+ * @returns {Promise<*|null>}
+ */
+export async function fetchStats() {
+    try {
+        const res = await axios.get(`${API_BASE_URL}/api/stats`);
+        return res.data;
+    } catch (err) {
+        console.error("Failed to fetch stats:", err);
+        return null;
+    }
+}
+
+/**
+ * Fetch time-bucketed chart series (bucketed and downsampled on the server)
+ * @param params interval (hour|day|week), group_by (project|user), start, end,
+ *               max_points, limit
+ * @returns {Promise<*|null>} { interval, step, bucket_seconds, series: { name: [points] } }
+ */
+export async function fetchSeries(params = {}) {
+    try {
+        const res = await axios.get(`${API_BASE_URL}/api/series`, { params });
+        return res.data;
+    } catch (err) {
+        console.error("Failed to fetch series:", err);
+        return null;
+    }
+}
+
+// Fetch mock GitHub commits (queued as a background job on the backend)
 export async function processCommits() {
     const res = await fetch(`${API_BASE_URL}/api/process_commits`, { method: "POST" });
     if (!res.ok) throw new Error(`HTTP ${res.status}`);
-    return res.json();
+    const { job_id } = await res.json();
+    return waitForJob(job_id);
+}
+
+/**
+ * Poll a backend job until it finishes
+ * @param jobId
+ * @param intervalMs
+ * @returns {Promise<*>} the job result
+ */
+export async function waitForJob(jobId, intervalMs = 1000) {
+    for (;;) {
+        const res = await fetch(`${API_BASE_URL}/api/jobs/${jobId}`);
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        const job = await res.json();
+        if (job.status === "done") return job.result;
+        if (job.status === "failed") throw new Error(job.error);
+        await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+}
+
+/**
+ * Subscribe to live updates from /api/stream (Server-Sent Events)
+ * @param handlers { onRecords(items), onAggregates(delta), onResync() }
+ * @returns {function(): void} call to close the stream
+ */
+export function subscribeStream({ onRecords, onAggregates, onResync } = {}) {
+    const source = new EventSource(`${API_BASE_URL}/api/stream`);
+    const listen = (event, handler) => {
+        if (handler) source.addEventListener(event, (e) => handler(JSON.parse(e.data)));
+    };
+    listen("records", onRecords && ((data) => onRecords(data.items)));
+    listen("aggregates", onAggregates);
+    listen("resync", onResync);
+    return () => source.close();
 }
 
 export async function fetchProcessed() {
@@ -66,4 +132,19 @@ export async function aiExplain(record) {
         body: JSON.stringify(record),
     });
     return await response.json();
-}
\ No newline at end of file
+}
+
+/**
+ * Explanations for many records in one request (cached server-side per commit hash and the fields the explainer reads)
+ * @param records
+ * @returns {Promise<Array<{commit_hash, ai_explanation, cached, error?}>>} in input order
+ */
+export async function aiExplainBatch(records) {
+    const response = await fetch(`${API_BASE_URL}/api/ai_explain/batch`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ records }),
+    });
+    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+    return (await response.json()).items;
+}
@@ -1,6 +1,6 @@
 import '../styles/Dashboard.css';
 import { useEffect, useState } from 'react';
-import { fetchHistory } from '../api';
+import { fetchHistory, fetchSeries, fetchStats, subscribeStream } from '../api';
 import {
     LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer,
     AreaChart, Area,
@@ -9,84 +9,73 @@ import {
     RadarChart, PolarGrid, PolarAngleAxis, PolarRadiusAxis, Radar
 } from 'recharts';
 
+// Charts are drawn from server-side aggregates, so their size does not grow with the history
+const SERIES_POINTS = 120;
+const RECENT_COMMITS = 6;
+// Live updates arrive per ingested chunk; refetch the aggregates at most this often
+const REFRESH_MS = 2000;
+
 function Dashboard() {
-    const [commits, setCommits] = useState([]);
+    const [stats, setStats] = useState(null);
+    const [series, setSeries] = useState([]);
+    const [recentCommits, setRecentCommits] = useState([]);
     const [loading, setLoading] = useState(true);
 
     useEffect(() => {
         async function loadData() {
-            const data = await fetchHistory();
-            setCommits(data || []);
+            const [totals, daily, recent] = await Promise.all([
+                fetchStats(),
+                fetchSeries({ interval: 'day', max_points: SERIES_POINTS }),
+                fetchHistory({ limit: RECENT_COMMITS }),
+            ]);
+            setStats(totals);
+            setSeries(daily?.series?.all || []);
+            setRecentCommits(recent?.items || []);
             setLoading(false);
         }
         loadData();
+
+        let timer = null;
+        const scheduleReload = () => {
+            if (!timer) timer = setTimeout(() => { timer = null; loadData(); }, REFRESH_MS);
+        };
+        const unsubscribe = subscribeStream({
+            onAggregates: scheduleReload,
+            onResync: scheduleReload,
+        });
+        return () => {
+            clearTimeout(timer);
+            unsubscribe();
+        };
     }, []);
 
     if (loading) return <p>Loading dashboard...</p>;
 
     // --- Summary ---
-    const totalCommits = commits.length;
-    const totalProjects = new Set(commits.map(c => c.project)).size;
-    const avgRiskScore = commits.length
-        ? (commits.reduce((sum, c) => sum + c.risk_score, 0) / commits.length).toFixed(1)
-        : 0;
-    const freezeRequests = commits.filter(c => c.freeze_request).length;
-    const freezeByProject = Object.entries(
-        commits.reduce((acc, c) => {
-            acc[c.project] = acc[c.project] || 0;
-            if (c.freeze_request) acc[c.project]++;
-            return acc;
-        }, {})
-    ).map(([project, freezeCount]) => ({ project, freezeCount }));
-
-    // --- Chart Data ---
-    const commitsByDate = Object.entries(
-        commits.reduce((acc, c) => {
-            const date = new Date(c.timestamp).toISOString().split('T')[0];
-            acc[date] = (acc[date] || 0) + 1;
-            return acc;
-        }, {})
-    ).map(([date, commits]) => ({ date, commits }));
-
-    const riskConfidence = Object.entries(
-        commits.reduce((acc, c) => {
-            const date = new Date(c.timestamp).toISOString().split('T')[0];
-            if (!acc[date]) acc[date] = { date, riskTotal: 0, confTotal: 0, count: 0 };
-            acc[date].riskTotal += c.risk_score;
-            acc[date].confTotal += c.confident_score;
-            acc[date].count++;
-            return acc;
-        }, {})
-    ).map(([date, v]) => ({
-        date,
-        avgRisk: (v.riskTotal / v.count).toFixed(1),
-        avgConf: (v.confTotal / v.count).toFixed(1),
+    const totals = stats?.global || {};
+    const totalCommits = totals.count || 0;
+    const totalProjects = totals.project_count || 0;
+    const avgRiskScore = (totals.avg_risk || 0).toFixed(1);
+    const freezeRequests = totals.freeze_count || 0;
+    const projects = Object.entries(stats?.projects || {});
+    const freezeByProject = projects.map(([project, p]) => ({ project, freezeCount: p.freeze_count }));
+
+    // --- Chart Data (one point per bucket; several days per bucket on long ranges) ---
+    const commitsByDate = series.map(p => ({ date: p.t.split('T')[0], commits: p.count }));
+
+    const riskConfidence = series.map(p => ({
+        date: p.t.split('T')[0],
+        avgRisk: p.avg_risk.toFixed(1),
+        avgConf: p.avg_confidence.toFixed(1),
     }));
 
-    const projectRisk = Object.entries(
-        commits.reduce((acc, c) => {
-            acc[c.project] = acc[c.project] || [];
-            acc[c.project].push(c.risk_score);
-            return acc;
-        }, {})
-    ).map(([project, scores]) => ({
-        project,
-        avgRisk: (scores.reduce((a, b) => a + b, 0) / scores.length).toFixed(1)
-    }));
+    const projectRisk = projects.map(([project, p]) => ({ project, avgRisk: p.avg_risk.toFixed(1) }));
 
-    const topContributors = Object.entries(
-        commits.reduce((acc, c) => {
-            acc[c.user] = (acc[c.user] || 0) + 1;
-            return acc;
-        }, {})
-    ).map(([user, count]) => ({ user, count }));
+    const topContributors = Object.entries(stats?.users || {})
+        .map(([user, u]) => ({ user, count: u.count }));
 
     const COLORS = ['#2563eb', '#82ca9d', '#f97316', '#8884d8', '#ef4444', '#22d3ee'];
 
-    const recentCommits = [...commits]
-        .sort((a, b) => new Date(b.timestamp) - new Date(a.timestamp))
-        .slice(0, 6);
-
     return (
         <div className="dashboard-page">
             <h2>Sentinel Analytics Dashboard</h2>
@@ -1,6 +1,9 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import "../styles/dataRecords.css";
-import { fetchProcessed, processCommits, aiExplain } from "../api";
+import { fetchProcessed, processCommits, aiExplainBatch } from "../api";
+
+// Rows explained per request: the opened record and the ones after it
+const EXPLAIN_PREFETCH = 20;
 
 function DataRecords() {
     const [records, setRecords] = useState([]);
@@ -8,6 +11,8 @@ function DataRecords() {
     const [loading, setLoading] = useState(false);
     const [AIInsight, setAIInsight] = useState("");
     const [fetching, setFetching] = useState(false);
+    // Explanations fetched so far, per record object (reloaded records start over)
+    const explanations = useRef(new WeakMap());
 
     const user = JSON.parse(localStorage.getItem("sentinel_user"));
 
@@ -67,9 +72,21 @@ function DataRecords() {
 
     // --- AI Insight ---
     async function handleAIExplain(record) {
+        const known = explanations.current.get(record);
+        if (known) {
+            setAIInsight(known);
+            return;
+        }
         try {
-            const res = await aiExplain(record);
-            setAIInsight(res.ai_explanation);
+            // One batch request for this record and the following rows, so stepping through the table is instant
+            const start = records.indexOf(record);
+            const batch = [record, ...records.slice(start + 1, start + EXPLAIN_PREFETCH)]
+                .filter((r) => !explanations.current.has(r));
+            const items = await aiExplainBatch(batch);
+            items.forEach((item, i) => {
+                if (item.ai_explanation) explanations.current.set(batch[i], item.ai_explanation);
+            });
+            setAIInsight(explanations.current.get(record) || "⚠️ Failed to retrieve AI insight.");
         } catch (e) {
             setAIInsight("⚠️ Failed to retrieve AI insight.");
         }
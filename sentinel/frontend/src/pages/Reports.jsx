@@ -1,42 +1,56 @@
 import "../styles/Report.css";
 import {useEffect, useState} from "react";
-import {fetchHistory, fetchInsights} from "../api";
+import {fetchStats, fetchInsights, subscribeStream} from "../api";
 import {
     LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, Legend,
     BarChart, Bar, ResponsiveContainer, PieChart, Pie, Cell
 } from "recharts";
 
 function Reports() {
-    const [records, setRecords] = useState([]);
+    const [stats, setStats] = useState(null);
     const [insight, setInsight] = useState("Loading AI insights...");
 
     useEffect(() => {
         async function loadData() {
-            const data = await fetchHistory();
-            setRecords(data || []);
+            const data = await fetchStats();
+            setStats(data);
 
             const ai = await fetchInsights();
             setInsight(ai.insight || "No insight available.")
         }
 
         loadData();
+
+        // Merge aggregate deltas: changed buckets are replaced, emptied ones (null) removed
+        return subscribeStream({
+            onAggregates: (delta) => setStats((prev) => {
+                if (!prev) return prev;
+                const next = {...prev, global: delta.global};
+                for (const section of ["projects", "users", "days"]) {
+                    next[section] = {...prev[section]};
+                    for (const [key, totals] of Object.entries(delta[section] || {})) {
+                        if (totals) next[section][key] = totals;
+                        else delete next[section][key];
+                    }
+                }
+                return next;
+            }),
+            onResync: loadData,
+        });
     }, []);
 
-    // ----- Data Aggregation -----
-    const totalCommits = records.length;
-    const avgRisk = records.reduce((a, b) => a + b.risk_score, 0) / (records.length || 1);
-    const avgConfidence = records.reduce((a, b) => a + b.confident_score, 0) / (records.length || 1);
-    const freezeCount = records.filter(r => r.freeze_request).length;
-
-    const riskByProject = Object.entries(
-        records.reduce((acc, r) => {
-            acc[r.project] = acc[r.project] || [];
-            acc[r.project].push(r.risk_score);
-            return acc;
-        }, {})
-    ).map(([project, arr]) => ({
+    // ----- Data Aggregation (pre-computed by /api/stats) -----
+    const totals = stats?.global || {};
+    const totalCommits = totals.count || 0;
+    const avgRisk = totals.avg_risk || 0;
+    const avgConfidence = totals.avg_confidence || 0;
+    const freezeCount = totals.freeze_count || 0;
+
+    const riskByProject = Object.entries(stats?.projects || {}).map(([project, p]) => ({
         project,
-        avgRisk: (arr.reduce((a, b) => a + b, 0) / arr.length).toFixed(1),
+        avgRisk: p.avg_risk.toFixed(1),
+        count: p.count,
+        freezeCount: p.freeze_count,
     }));
 
     const COLORS = ["#2563eb", "#f97316", "#22c55e", "#a855f7", "#e11d48"];
@@ -121,8 +135,8 @@ function Reports() {
                         <tr key={i}>
                             <td>{p.project}</td>
                             <td>{p.avgRisk}</td>
-                            <td>{records.filter(r => r.project === p.project).length}</td>
-                            <td>{records.filter(r => r.project === p.project && r.freeze_request).length}</td>
+                            <td>{p.count}</td>
+                            <td>{p.freezeCount}</td>
                         </tr>
                     ))}
                     </tbody>